@@ -0,0 +1,80 @@
+"""
+Measures how long it takes to resolve the `attributes` argument of `analyze` into attribute names, for the kinds of values it accepts, and for an
+`AttributeSet` which has been resolved beforehand. The "legacy" lines resolve the same values the way `analyze` used to, by scanning and
+splitting strings, for comparison. No requests are sent.
+
+    python benchmarks/bench_attributes.py --number 20000
+"""
+from perspective import Client, Attributes, AttributeSet
+from perspective.attributes import all_attrs, all_attr_grps
+
+import argparse
+import difflib
+import timeit
+
+CASES = {
+    "group": Attributes.Production,
+    "objects": [Attributes.TOXICITY, Attributes.INSULT, Attributes.THREAT],
+    "names": ["toxicity", "Severe Toxicity", "identity_attack"],
+    "typos": ["toxicty", "INSLUT", "THRET"],
+    "mixed": [Attributes.NewYorkTimes, "FLIRTATION", Attributes.SEXUALLY_EXPLICIT],
+}
+
+def closest(attribute: str):
+    try:
+        return difflib.get_close_matches(attribute, all_attrs, n=1)[0]
+    except IndexError:
+        return None
+
+def legacy(attributes, **options) -> list[str]:
+    # The loop that resolved the attributes before they were indexed, without its checks for empty and string arguments.
+    try:
+        for _ in attributes:
+            pass
+    except TypeError:
+        attributes = repr(attributes).split("\",\"")
+    attributes = list(attributes)
+
+    for _ in range(2):
+        for attribute in attributes:
+            if f'{attribute=}'.split('=')[1].replace('\'','').upper() in all_attrs:
+                attributes[attributes.index(attribute)] = f'{attribute=}'.split('=')[1].replace('\'','').upper()
+            else:
+                if not closest(f'{attribute=}'.split('=')[1].replace('\'','').upper()):
+                    operation = 0
+                    for attr in attributes:
+                        if attr in all_attr_grps:
+                            attributes += repr(all_attr_grps[all_attr_grps.index(attr)]).split("\",\"")
+                            del attributes[attributes.index(attr)]
+                            operation += 1
+                    if operation != 0:
+                        break
+                    if options.get("skip_on_unknown"):
+                        del attributes[attributes.index(attribute)]
+                        continue
+                    raise ValueError(f"Attribute \"{attribute}\" is unknown.")
+                else:
+                    attributes[attributes.index(attribute)] = closest(f'{attribute=}'.split('=')[1].replace('\'','').upper())
+    return attributes
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=10000, help="how many times to resolve each case")
+    args = parser.parse_args()
+
+    client = Client(token="benchmark")
+    for name, attributes in CASES.items():
+        resolved = AttributeSet(attributes)
+        for label, value in ((name, attributes), (f"{name} (set)", resolved)):
+            seconds = min(timeit.repeat(lambda: client._resolve_attributes(value), number=args.number, repeat=3)) / args.number
+            print(f"{label:>16}: {seconds * 1e6:8.2f} µs per call")
+        try:
+            legacy(attributes)
+        except Exception as exceptionDetails:
+            print(f"{name + ' (legacy)':>16}: fails with {type(exceptionDetails).__name__}")
+            continue
+        seconds = min(timeit.repeat(lambda: legacy(attributes), number=args.number, repeat=3)) / args.number
+        print(f"{name + ' (legacy)':>16}: {seconds * 1e6:8.2f} µs per call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Renders thousands of charts in a single process and reports the memory of the process as it goes, to check that it stays flat. `save_graph`
+draws every chart on the same Agg figure; the "pyplot" case draws them the way `save_graph` used to, a new pyplot figure per chart which is
+never closed, for comparison. The "render_graphs" case renders all of the charts with `render_graphs` across a pool of `--workers` processes
+and reports the throughput. Responses are generated locally, no requests are sent.
+
+    python benchmarks/bench_graphs.py --charts 5000
+    python benchmarks/bench_graphs.py --charts 2000 --case render_graphs --workers 8
+    python benchmarks/bench_graphs.py --charts 50 --reports 5 --case pyplot
+"""
+from perspective import Attributes, utils
+from perspective.testing import StandInServer
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+def rss() -> float:
+    # The current resident memory in MiB where /proc is available, the peak resident memory elsewhere.
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if os.uname().sysname == "Darwin" else peak / 2 ** 10
+
+def scores(index: int, attributes: list[str]) -> dict:
+    text = f"benchmark text {index}"
+    return {attribute: StandInServer.score(text, attribute) * 100 for attribute in attributes}
+
+def pyplot(response: dict, filename: str) -> None:
+    import matplotlib.pyplot as plt
+    fig = plt.figure(f"chart {filename}", figsize=(15, 6), dpi=80)
+    ax = fig.add_subplot(111)
+    keys, values = zip(*sorted(response.items(), key=lambda item: item[1]))
+    ax.barh(keys, values)
+    plt.title("Perspective API result")
+    plt.savefig(filename, bbox_inches='tight')
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000, help="how many charts to render")
+    parser.add_argument("--case", choices=("save_graph", "pyplot", "render_graphs"), default="save_graph", help="how to render the charts")
+    parser.add_argument("--reports", type=int, default=10, help="how many times to report the memory")
+    parser.add_argument("--workers", type=int, default=None, help="how many processes render_graphs uses, a process per CPU by default")
+    args = parser.parse_args()
+
+    if args.case == "render_graphs":
+        attributes = repr(Attributes.Production).split("\",\"")
+        responses = [scores(index, attributes) for index in range(args.charts)]
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            results = utils.render_graphs(responses, directory, max_workers=args.workers)
+            elapsed = time.perf_counter() - start
+        failed = sum(not result.ok for result in results)
+        print(f"{args.charts} charts with {args.workers or os.cpu_count()} workers: {elapsed:.1f} s, {args.charts / elapsed:.1f} charts/s, {failed} failed")
+        return
+
+    if args.case == "pyplot":
+        import matplotlib
+        matplotlib.use("Agg")
+    attributes = repr(Attributes.Production).split("\",\"")
+    render = utils.save_graph if args.case == "save_graph" else pyplot
+    every = max(1, args.charts // args.reports)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chart.png")
+        # The first chart loads fonts and caches which stay for the lifetime of the process, so memory is measured after it.
+        render(scores(0, attributes), path)
+        baseline = rss()
+        start = time.perf_counter()
+        for index in range(1, args.charts + 1):
+            render(scores(index, attributes), path)
+            if index % every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{index:>8} charts: {rss():8.1f} MiB ({rss() - baseline:+7.1f}), {index / elapsed:6.1f} charts/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures how long `import perspective` takes in a fresh interpreter with `-X importtime`, and checks that it stays within a budget and that none of
+the heavy dependencies, which are only needed by some features, are imported along with it. Exits with status 1 if either check fails, so it can
+be used as a regression check.
+
+    python benchmarks/bench_import.py --runs 5 --budget 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that must not be imported by `import perspective` alone.
+LAZY_MODULES = ["googleapiclient", "httplib2", "matplotlib", "numpy", "pycountry", "sqlite3", "asyncio"]
+
+def measure(module: str) -> tuple[float, dict[str, int], list[str]]:
+    """
+    Imports `module` in a new interpreter and returns the total import time in milliseconds, the cumulative import time of every module imported
+    by it in microseconds, and which of `LAZY_MODULES` ended up being imported.
+    """
+    code = f"import sys, {module}; print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=True)
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((name.strip(), len(name) - len(name.lstrip()), int(cumulative)))
+    # Modules are listed after the modules they import, nested one level deeper, so the ones imported by `module` directly precede it.
+    index = max(i for i, (name, _, _) in enumerate(entries) if name == module)
+    depth = entries[index][1]
+    start = index
+    while start > 0 and entries[start - 1][1] > depth:
+        start -= 1
+    modules = {name: cumulative for name, _, cumulative in entries[start:index + 1]}
+    loaded = [name for name in process.stdout.strip().split(",") if name]
+    return modules[module] / 1000, modules, loaded
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="how many times to import the package")
+    parser.add_argument("--budget", type=float, default=150.0, help="the maximum median import time, in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest modules to list")
+    args = parser.parse_args()
+
+    results = [measure("perspective") for _ in range(args.runs)]
+    median = statistics.median(total for total, _, _ in results)
+    _, modules, loaded = results[-1]
+
+    print(f"import perspective: {median:.1f} ms (median of {args.runs}, budget {args.budget:.0f} ms)")
+    for name, cumulative in sorted(modules.items(), key=lambda item: item[1], reverse=True)[1:args.top + 1]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if median > args.budget:
+        print(f"FAIL: import time is over the budget of {args.budget:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported eagerly: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
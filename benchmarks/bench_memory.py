@@ -0,0 +1,61 @@
+"""
+Measures how much memory a result of `analyze` takes when many results are kept in memory, comparing the dictionary that `analyze` returns by
+default and the raw response with `perspective.results.AnalysisResult`, which is returned with the `compact` option. Responses are generated
+locally, no requests are sent.
+
+    python benchmarks/bench_memory.py --results 100000
+"""
+from perspective import Attributes, AnalysisResult
+from perspective.testing import StandInServer
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+def response(index: int, attributes: list[str]) -> dict:
+    text = f"benchmark text {index}"
+    return {
+        "attributeScores": {
+            attribute: {
+                "spanScores": [{"begin": 0, "end": len(text), "score": {"value": StandInServer.score(text, attribute), "type": "PROBABILITY"}}],
+                "summaryScore": {"value": StandInServer.score(text, attribute), "type": "PROBABILITY"},
+            } for attribute in attributes
+        },
+        "languages": ["en"],
+        "detectedLanguages": ["en"],
+    }
+
+def simplified(response: dict) -> dict:
+    # The same conversion as `analyze` does without the `return_raw` and `compact` options.
+    return {attribute: float(scores["summaryScore"]["value"]) * 100 for attribute, scores in response["attributeScores"].items()}
+
+def measure(build, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    results = [build(index) for index in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return size / count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=50000, help="how many results to keep in memory")
+    args = parser.parse_args()
+
+    attributes = repr(Attributes.Production).split("\",\"")
+    # Responses are parsed from JSON like the transports do, so that attribute names aren't shared between results.
+    responses = [json.dumps(response(index, attributes)) for index in range(args.results)]
+    cases = {
+        "dict": lambda index: simplified(json.loads(responses[index])),
+        "raw dict": lambda index: json.loads(responses[index]),
+        "AnalysisResult": lambda index: AnalysisResult.from_response(json.loads(responses[index])),
+        "AnalysisResult (keep_raw)": lambda index: AnalysisResult.from_response(json.loads(responses[index]), keep_raw=True),
+    }
+    sizes = {name: measure(build, args.results) for name, build in cases.items()}
+    for name, size in sizes.items():
+        print(f"{name:>26}: {size:8.0f} bytes per result ({sizes['dict'] / size:5.2f}x of dict)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Measures the per-call overhead of the transports of `perspective.Client` by analyzing texts one by one against a local stand-in server, which
+answers instantly, so what is measured is the time spent on the client side and in the local network stack.
+
+    python benchmarks/bench_transport.py --requests 2000
+"""
+from perspective import Client, Attributes
+from perspective.testing import StandInServer
+from perspective.transport import HTTPTransport
+
+import argparse
+import time
+
+def run(client: Client, requests: int) -> float:
+    client.analyze("warm up", attributes=[Attributes.TOXICITY])
+    start = time.perf_counter()
+    for i in range(requests):
+        client.analyze(f"benchmark text {i}", attributes=[Attributes.TOXICITY, Attributes.INSULT])
+    return (time.perf_counter() - start) / requests
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="how many requests to send with each transport")
+    args = parser.parse_args()
+
+    with StandInServer() as server:
+        results = {
+            "discovery": run(Client(token="benchmark", base_url=server.url, transport="discovery"), args.requests),
+            "http": run(Client(token="benchmark", base_url=server.url, transport=HTTPTransport(base_url=server.url, pool_size=1)), args.requests),
+        }
+    for name, seconds in results.items():
+        print(f"{name:>10}: {seconds * 1e6:8.1f} µs per call")
+    print(f"{'speedup':>10}: {results['discovery'] / results['http']:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -14,5 +14,14 @@ __copyright__ = "Copyright 2017-2023 Yilmaz Alpaslan"
 __version__ = "0.3.4"
 
 from .main import Client
-from .attributes import Attributes, all_attr_grps, all_attrs, all_expr_attrs, all_newy_attrs, all_prod_attrs
+from .ratelimit import RateLimiter, SharedRateLimiter
+from .results import AnalysisResult
+from .attributes import Attributes, AttributeSet, all_attr_grps, all_attrs, all_expr_attrs, all_newy_attrs, all_prod_attrs
 from .utils import Utils as utils
+
+def __getattr__(name: str):
+    # AsyncClient is imported on first access, so that programs which don't use it don't pay for importing asyncio.
+    if name == "AsyncClient":
+        from .aio import AsyncClient
+        return AsyncClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
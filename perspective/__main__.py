@@ -0,0 +1,11 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from .cli import main
+
+import sys
+
+sys.exit(main())
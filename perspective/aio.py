@@ -0,0 +1,257 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Optional, Literal, Union
+from urllib.parse import urlsplit, quote
+
+from .attributes import Attributes
+from .errors import *
+from .cache import Cache
+from .main import _BaseClient, API_URL
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .transport import _connection_error, _http_error, _retryable
+
+import asyncio
+import json
+import ssl
+import time
+
+class _AsyncConnectionPool:
+    """
+    A minimal HTTP/1.1 client built on top of asyncio streams which keeps idle connections open for reuse. At most `size` requests are sent at once;
+    any other request waits for a connection to become free.
+    """
+    def __init__(self, url: str, size: int = 100, timeout: Optional[float] = 30.0) -> None:
+        url = urlsplit(url)
+        self.host = url.hostname
+        self.secure = url.scheme == "https"
+        self.port = url.port or (443 if self.secure else 80)
+        self.path = url.path.rstrip("/") + "/"
+        self.timeout = timeout
+        self.__ssl = ssl.create_default_context() if self.secure else None
+        self.__semaphore = asyncio.Semaphore(size)
+        self.__idle = []
+
+    async def __connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self.host, self.port, ssl=self.__ssl)
+
+    async def __send(self, connection: tuple[asyncio.StreamReader, asyncio.StreamWriter], method: str, path: str, body: bytes, responded: list[bool]) -> tuple[int, bytes, bool]:
+        reader, writer = connection
+        writer.write(
+            f"{method} {self.path}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("The connection was closed by the server.")
+        responded[0] = True
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(chunks)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return status, data, keep_alive
+
+    async def request(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        async with self.__semaphore:
+            for attempt in range(2):
+                reused = bool(self.__idle)
+                if reused:
+                    connection = self.__idle.pop()
+                else:
+                    # A connect that hangs, such as to a host which drops packets, would otherwise hold a slot of the pool forever.
+                    try:
+                        connection = await asyncio.wait_for(self.__connect(), self.timeout)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError("Connecting to the API has timed out.") from None
+                responded = [False]
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(self.__send(connection, method, path, body, responded), self.timeout)
+                except asyncio.TimeoutError:
+                    connection[1].close()
+                    # asyncio.TimeoutError is only the built-in TimeoutError from Python 3.11 on.
+                    raise TimeoutError("The request to the API has timed out.") from None
+                except (ConnectionError, asyncio.IncompleteReadError) as exceptionDetails:
+                    connection[1].close()
+                    if _retryable(exceptionDetails, reused, attempt, responded[0]):
+                        continue
+                    raise exceptionDetails
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if keep_alive:
+                    self.__idle.append(connection)
+                else:
+                    connection[1].close()
+                return status, data
+
+    async def close(self) -> None:
+        while self.__idle:
+            _, writer = self.__idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+class AsyncClient(_BaseClient):
+    """
+    An asyncio counterpart of :class:`perspective.Client`. Requests are sent through a non-blocking HTTP transport over keep-alive connections, so
+    thousands of texts can be analyzed concurrently on a single event loop without a thread per request.
+
+    ```py
+    async with AsyncClient(token=API_KEY, max_concurrency=50) as client:
+        results = await asyncio.gather(*(client.analyze(text) for text in texts))
+    ```
+
+    Parameters
+    -----------
+    token: :class:`str`
+        Your Perspective API key.
+    logging_level: :class:`Optional[Union[str, int]]`
+        The logging level, same as in :class:`perspective.Client`. Default is `None`, which disables logging.
+    max_concurrency: :class:`int`
+        The maximum number of requests to have in flight at the same time, which is also the maximum number of open connections. Default is `100`.
+    timeout: :class:`Optional[float]`
+        How many seconds to wait for a single request to complete. Default is `30.0`.
+    base_url: :class:`str`
+        The root URL of the API. Default is the Perspective API itself, it only needs to be changed for testing against a local server.
+    qps: :class:`Optional[float]`
+        If set, at most this many requests are sent per second on average. Default is `None` (no limit).
+    burst: :class:`Optional[int]`
+        How many requests may be sent at once when `qps` is set. Default is `1`.
+    rate_limiter: :class:`Optional[perspective.RateLimiter]`
+        A rate limiter to send every request through instead of creating one from `qps` and `burst`. Default is `None`.
+    cache: :class:`Optional[perspective.cache.Cache]`
+        A cache to store responses in. Texts that have already been analyzed for the same attributes, language and options are answered from the
+        cache without sending a request. Default is `None`.
+    metrics: :class:`Optional[perspective.metrics.Metrics]`
+        Metrics to count the requests, texts, attributes, errors, retries, skipped attributes and cache hits of the client in, and to measure the
+        latency of the phases of its requests with. Default is `None`, which doesn't measure anything.
+    """
+    def __init__(self, token: str, logging_level: Optional[Union[Literal["NOTSET", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"], Literal[0, 10, 20, 30, 40, 50]]] = None, max_concurrency: int = 100, timeout: Optional[float] = 30.0, base_url: str = API_URL, qps: Optional[float] = None, burst: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None, cache: Optional[Cache] = None, metrics: Optional[Metrics] = None) -> None:
+        super().__init__(logging_level=logging_level, qps=qps, burst=burst, rate_limiter=rate_limiter, cache=cache, metrics=metrics)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.__token = token
+        self.__pool = _AsyncConnectionPool(base_url, size=max_concurrency, timeout=timeout)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Closes all idle connections. The client can still be used afterwards, new connections will be opened as needed.
+        """
+        await self.__pool.close()
+
+    def change_token(self, token: str) -> None:
+        self.__token = token
+
+    async def analyze(self, text: str, attributes: list[str] = Attributes.Production, language: Optional[str] = None, **options) -> dict:
+        """
+        Make a request to the Perspective API with the text and requested attributes that you've specified. Accepts the very same arguments as
+        :meth:`perspective.Client.analyze`.
+
+        Parameters
+        -----------
+        text: :class:`str`
+            The text to analyze.
+        attributes: :class:`list[str]`
+            A list of attributes to analyze the text for. Default is `perspective.Attributes.Production` (all production-ready attributes).
+        language: :class:`Optional[str]`
+            The language of text. If `None`, language will be automatically detected. Default is `None`.
+        \*\*options
+            skip_on_lang: :class:`bool`
+                Whether to skip the attribute if the attribute does not support the text's language, or raise an `UnsupportedLanguageError` exception. Default is `False`.
+            skip_on_unknown: :class:`bool`
+                Whether to skip the attribute if it's invalid/unknown. Default is `False`.
+            return_raw: :class:`bool`
+                Whether to return the raw response or a simplified response with only attributes and their score values. Default is `False`.
+            span_annotations: :class:`bool`
+                Whether to ask for the scores of each sentence of the text too, which are in the `spanScores` of the raw response. Default is `False`.
+
+        Returns
+        --------
+        :class:`dict`: A dictionary containing percents of every attribute requested.
+        """
+        start_timestamp = time.time()
+        if self.metrics is None:
+            return await self.__analyze(text, attributes, language, start_timestamp, **options)
+        try:
+            result = await self.__analyze(text, attributes, language, start_timestamp, **options)
+        except Exception as exceptionDetails:
+            self.metrics.count("errors", type(exceptionDetails).__name__)
+            raise
+        self.metrics.observe("total", time.time() - start_timestamp)
+        return result
+
+    async def __analyze(self, text: str, attributes: list[str], language: Optional[str], start_timestamp: float, **options) -> dict:
+        attributes = self._resolve_attributes(attributes, **options)
+        analyze_request = self._build_request(text, attributes, self._resolve_language(language), bool(options.get("span_annotations")))
+        if self.metrics is not None:
+            self.metrics.observe("validation", time.time() - start_timestamp)
+        key, response = self._cache_lookup(analyze_request, **options)
+        if response is None:
+            response = await self._execute(analyze_request, **options)
+            if key is not None:
+                self.cache.set(key, response)
+        return self._build_result(analyze_request, response, start_timestamp, **options)
+
+    async def _execute(self, analyze_request: dict, **options) -> dict:
+        self._plan_request(analyze_request, **options)
+        while analyze_request["requestedAttributes"]:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            if self.metrics is not None:
+                self.metrics.count("requests")
+            start = time.perf_counter()
+            payload = json.dumps(analyze_request).encode("utf-8")
+            sent = time.perf_counter()
+            try:
+                status, data = await self.__pool.request("POST", f"v1alpha1/comments:analyze?key={quote(self.__token)}&alt=json", payload)
+            except (OSError, asyncio.IncompleteReadError) as exceptionDetails:
+                raise _connection_error(exceptionDetails).with_traceback(exceptionDetails.__traceback__) from None
+            received = time.perf_counter()
+            if self.metrics is not None:
+                self.metrics.observe("serialization", sent - start)
+                self.metrics.observe("network", received - sent)
+            if status == 200:
+                response = json.loads(data)
+                if self.metrics is not None:
+                    self.metrics.observe("parse", time.perf_counter() - received)
+                return response
+            self._handle_error(str(_http_error(status, data)), analyze_request, status, **options)
+        return {"attributeScores": {}}
@@ -4,6 +4,15 @@ __license__ = "MIT"
 __copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
 __version__ = "1.0.0"
 
+from types import MappingProxyType
+from typing import Iterable, Optional, Union
+
+from .errors import *
+
+import difflib
+import functools
+import threading
+
 all_attrs = ["TOXICITY", "SEVERE_TOXICITY", "IDENTITY_ATTACK", 
 "INSULT", "PROFANITY", "THREAT", "TOXICITY_EXPERIMENTAL", 
 "SEVERE_TOXICITY_EXPERIMENTAL", "IDENTITY_ATTACK_EXPERIMENTAL", 
@@ -434,3 +443,178 @@ class Attributes:
             return "UNSUBSTANTIAL"
     UNSUBSTANTIAL = UNSUBSTANTIAL()
 all_attr_grps = [Attributes.All, Attributes.Production, Attributes.Experimental, Attributes.NewYorkTimes]
+
+# Attribute names by every way they can be written in, such as "TOXICITY", "toxicity" or "Severe Toxicity"; built once at import time.
+_attribute_names = MappingProxyType({
+    **{name: name for name in all_attrs},
+    **{name.replace("_", " "): name for name in all_attrs},
+    **{name.replace("_", "-"): name for name in all_attrs},
+})
+# Attribute names of the objects in `Attributes`, including groups, and of the `repr` of groups such as '"TOXICITY","INSULT"'.
+_attribute_objects = MappingProxyType({
+    **{getattr(Attributes, name): (name,) for name in all_attrs},
+    **{group: tuple(repr(group).split("\",\"")) for group in all_attr_grps},
+})
+_attribute_groups = MappingProxyType({repr(group): tuple(repr(group).split("\",\"")) for group in all_attr_grps})
+
+# Languages declared as supported by each attribute; attributes that don't declare any are left for the API to decide on.
+_supported_languages = MappingProxyType({
+    name: frozenset(getattr(Attributes, name).supportedLanguages) for name in all_attrs if hasattr(getattr(Attributes, name), "supportedLanguages")
+})
+
+@functools.lru_cache(maxsize=1024)
+def _closest_attribute(name: str) -> Optional[str]:
+    try:
+        return difflib.get_close_matches(name, all_attrs, n=1)[0]
+    except IndexError:
+        return None
+
+def _lookup_attribute(attribute: object) -> Optional[tuple[str, ...]]:
+    try:
+        names = _attribute_objects.get(attribute)
+    except TypeError:
+        names = None
+    if names is not None:
+        return names
+    name = (attribute if isinstance(attribute, str) else repr(attribute)).strip()
+    try:
+        return (_attribute_names[name.upper()],)
+    except KeyError:
+        pass
+    if name in _attribute_groups:
+        return _attribute_groups[name]
+    closest = _closest_attribute(name.upper())
+    return (closest,) if closest is not None else None
+
+class AttributeSet:
+    """
+    An immutable set of attributes which have been resolved and validated once, and which can be passed as `attributes` to every `analyze` call
+    without being validated again. Accepts the same values as the `attributes` argument of `analyze`: attribute objects, attribute groups, and
+    attribute names, in any case and with small spelling mistakes.
+
+    ```py
+    attributes = AttributeSet([Attributes.Production, "FLIRTATION"])
+    for text in texts:
+        client.analyze(text, attributes=attributes)
+    ```
+
+    Parameters
+    -----------
+    attributes: :class:`Union[list[str], str, object]`
+        The attributes to resolve.
+    skip_on_unknown: :class:`bool`
+        Whether to skip unknown attributes, or raise an `UnknownAttribute` exception. The skipped attributes are available from `skipped`. Default is `False`.
+    """
+    __slots__ = ("names", "skipped")
+
+    def __init__(self, attributes: Union[Iterable[Union[str, object]], str, object], skip_on_unknown: bool = False) -> None:
+        if isinstance(attributes, AttributeSet):
+            names, skipped = attributes.names, attributes.skipped
+        else:
+            names, skipped = self.__resolve(attributes, skip_on_unknown)
+        object.__setattr__(self, "names", names)
+        object.__setattr__(self, "skipped", skipped)
+
+    @staticmethod
+    def __resolve(attributes: Union[Iterable[Union[str, object]], str, object], skip_on_unknown: bool) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        try:
+            names = _attribute_objects.get(attributes)
+        except TypeError:
+            names = None
+        if names is not None:
+            return names, ()
+
+        if isinstance(attributes, str):
+            try:
+                return (_attribute_names[attributes.strip().upper()],), ()
+            except KeyError:
+                pass
+            if attributes in _attribute_groups:
+                return _attribute_groups[attributes], ()
+            if any(attr in attributes for attr in all_attrs):
+                raise InvalidFormat("The format of attributes provided is invalid. Please specify attributes by putting them into a list, such as [\"TOXICITY\", \"INSULT\"].") from None
+            raise MissingAttributes("No valid attributes were provided in attributes argument. Please specify at least one attribute.") from None
+
+        try:
+            attributes = list(attributes)
+        except TypeError:
+            attributes = [attributes]
+        if attributes == []:
+            raise MissingAttributes("No valid attributes were provided in attributes argument. Please specify at least one attribute.") from None
+
+        resolved = {}
+        skipped = []
+        for attribute in attributes:
+            names = _lookup_attribute(attribute)
+            if names is None:
+                name = attribute if isinstance(attribute, str) else repr(attribute)
+                if not skip_on_unknown:
+                    raise UnknownAttribute(f"Attribute \"{name}\" is unknown.") from None
+                skipped.append(name)
+                continue
+            for name in names:
+                resolved[name] = None
+        if not resolved:
+            raise MissingAttributes("No valid attributes were provided in attributes argument. Please specify at least one attribute.") from None
+        return tuple(resolved), tuple(skipped)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("AttributeSet objects are immutable.")
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, attribute: object) -> bool:
+        names = _lookup_attribute(attribute)
+        return names is not None and all(name in self.names for name in names)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AttributeSet) and set(self.names) == set(other.names)
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.names))
+
+    def __repr__(self) -> str:
+        return f"AttributeSet({list(self.names)!r})"
+
+class LanguageSupport:
+    """
+    Knows which attributes support which languages, from the `supportedLanguages` declared in :class:`Attributes` and from the rejections the API
+    has returned at runtime, so that attributes which don't support the language of a text can be dropped before the request is sent instead of
+    after a failed round trip. Rejections are only ever added, and a rejection takes precedence over the declared languages.
+    """
+    def __init__(self) -> None:
+        self.__rejected = frozenset()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __primary(language: str) -> str:
+        return language.replace("_", "-").split("-", 1)[0].lower()
+
+    def supports(self, attribute: str, language: str) -> bool:
+        """
+        Returns whether `attribute` is expected to support `language`. Attributes without any declared or learned information are assumed to support it.
+        """
+        language = self.__primary(language)
+        if (attribute, language) in self.__rejected:
+            return False
+        declared = _supported_languages.get(attribute)
+        return declared is None or language in declared
+
+    def reject(self, attribute: str, language: str) -> None:
+        """
+        Records that the API has rejected `attribute` for `language`.
+        """
+        with self.__lock:
+            self.__rejected = self.__rejected | {(attribute, self.__primary(language))}
+
+    def rejections(self) -> frozenset[tuple[str, str]]:
+        """
+        Returns the `(attribute, language)` pairs which have been rejected by the API so far.
+        """
+        return self.__rejected
+
+language_support = LanguageSupport()
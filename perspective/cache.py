@@ -0,0 +1,248 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+import copy
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+
+class Cache:
+    """
+    The base class of response caches. A cache stores raw responses of the API by a key derived from the text, the requested attributes,
+    the language and the options which change the response, so that both simplified and raw (`return_raw=True`) results can be served from it.
+    Caches are safe to use from several threads, and the same cache can be shared by several clients.
+    """
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(analyze_request: dict, normalize: bool = True, **options) -> str:
+        """
+        Returns the cache key of the body of a `comments:analyze` request. Texts which only differ in surrounding whitespace or Unicode normalization
+        share a key if `normalize` is set, unless span annotations are requested, since their offsets are only valid for the exact text.
+        """
+        text = analyze_request["comment"]["text"]
+        if normalize and not analyze_request.get("spanAnnotations"):
+            text = unicodedata.normalize("NFC", text).strip()
+        request = dict(analyze_request, comment=dict(analyze_request["comment"], text=text))
+        request["requestedAttributes"] = sorted(request["requestedAttributes"])
+        request["skip_on_lang"] = bool(options.get("skip_on_lang"))
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the response stored with `key`, or `None` if there's no such response or it has expired.
+        """
+        data = self._get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(data)
+
+    def set(self, key: str, response: dict) -> None:
+        """
+        Stores `response` with `key`, replacing any response stored with the same key.
+        """
+        self._set(key, json.dumps(response, separators=(",", ":"), ensure_ascii=False))
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, key: str, data: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """
+        Removes every response from the cache.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """
+        Returns the number of hits, misses and evicted (or expired) responses of the cache, and its current size.
+        """
+        size = len(self)
+        with self._lock:
+            requests = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hits / requests if requests else 0.0, "size": size}
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+class MemoryCache(Cache):
+    """
+    An in-memory cache which evicts the least recently used response when it's full.
+
+    Parameters
+    -----------
+    maxsize: :class:`int`
+        The maximum number of responses to keep. Default is `10000`.
+    ttl: :class:`Optional[float]`
+        How many seconds a response is valid for. If `None`, responses don't expire. Default is `None`.
+    """
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None) -> None:
+        super().__init__()
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            try:
+                expires, data = self.__entries[key]
+            except KeyError:
+                return None
+            if expires is not None and expires <= time.monotonic():
+                del self.__entries[key]
+                self.evictions += 1
+                return None
+            self.__entries.move_to_end(key)
+            return data
+
+    def _set(self, key: str, data: str) -> None:
+        with self._lock:
+            self.__entries[key] = (time.monotonic() + self.ttl if self.ttl is not None else None, data)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+class SQLiteCache(Cache):
+    """
+    A persistent cache stored in a SQLite3 database, which survives restarts and can be shared by several processes. When it's full, the oldest
+    responses are evicted first.
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the database. It's created if it doesn't exist.
+    ttl: :class:`Optional[float]`
+        How many seconds a response is valid for. If `None`, responses don't expire. Default is `None`.
+    maxsize: :class:`Optional[int]`
+        The maximum number of responses to keep. If `None`, there's no limit. The responses are counted when the cache is opened, but the count
+        isn't shared between processes afterwards, so a cache shared by several processes may hold up to `maxsize` responses per process, and its
+        size only includes the responses stored by other processes before it was opened. Default is `None`.
+    """
+    def __init__(self, filename: str, ttl: Optional[float] = None, maxsize: Optional[int] = None) -> None:
+        super().__init__()
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.filename = filename
+        self.ttl = ttl
+        self.maxsize = maxsize
+        import sqlite3 as sql
+
+        self.__connection = sql.connect(filename, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, expires REAL)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        # The number of responses is counted once and then kept up to date, so that storing a response doesn't count the whole table.
+        self.__count = self.__connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.__connection.execute("SELECT response, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= time.time():
+                self.__count -= self.__connection.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+                self.evictions += 1
+                return None
+            return row[0]
+
+    def _set(self, key: str, data: str) -> None:
+        now = time.time()
+        with self._lock:
+            if self.__connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is None:
+                self.__count += 1
+            self.__connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, data, now, now + self.ttl if self.ttl is not None else None))
+            if self.maxsize is not None and self.__count > self.maxsize:
+                evicted = self.__connection.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY created LIMIT ?)", (self.__count - self.maxsize,)).rowcount
+                self.__count -= evicted
+                self.evictions += evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self.__connection.execute("DELETE FROM responses")
+            self.__count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.__connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.__count
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same time: while a call with a key is running, any other thread calling with the same key
+    waits for its result instead of making the call again. Every waiting thread gets its own deep copy of the result, so that it can be modified
+    without affecting the others. If the call raises an exception, it is raised in every waiting thread as well.
+    """
+    def __init__(self) -> None:
+        self.calls = 0
+        self.saved = 0
+        self.__lock = threading.Lock()
+        self.__in_flight = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Calls `function` and returns its result, unless a call with the same `key` is already in flight, in which case waits for that one instead.
+        """
+        with self.__lock:
+            call = self.__in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.__in_flight[key] = [Future(), 0]
+                self.calls += 1
+            else:
+                call[1] += 1
+                self.saved += 1
+        future = call[0]
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            result = function()
+        except BaseException as exceptionDetails:
+            with self.__lock:
+                del self.__in_flight[key]
+            future.set_exception(exceptionDetails)
+            raise
+        # No thread can start waiting once the call is removed, so a snapshot is only taken if some thread is already waiting. The waiting threads
+        # copy the snapshot rather than the result, since the caller may modify the result as soon as it's returned.
+        with self.__lock:
+            del self.__in_flight[key]
+        future.set_result(copy.deepcopy(result) if call[1] else result)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns how many calls have been made and how many have been saved by waiting for an identical call in flight.
+        """
+        with self.__lock:
+            return {"calls": self.calls, "saved": self.saved}
@@ -0,0 +1,155 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Iterable, Mapping, NamedTuple, Optional, Sequence
+
+import os
+import threading
+
+# This module is only imported when a chart is drawn, since matplotlib takes longer to import than the rest of the library together.
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+matplotlib.set_loglevel("CRITICAL")
+
+FIGSIZE = (15, 6)
+DPI = 80
+
+def _label(attribute: str) -> str:
+    return attribute.replace("_"," ").title().replace("On ","on ").replace("To ","to ")
+
+def draw(ax: "matplotlib.axes.Axes", scores: Mapping[str, float], title: Optional[str] = None, grid_lines: bool = False, **kwargs) -> None:
+    """
+    Draws a horizontal bar chart of `scores`, a mapping of attributes and their score values as percents, on `ax`, with the highest score at the top.
+    Keyword arguments are passed to `matplotlib.axes.Axes.barh`.
+    """
+    scores = sorted(scores.items(), key=lambda item: item[1])
+    labels = [_label(attribute) for attribute, _ in scores]
+    values = [value for _, value in scores]
+
+    ax.barh(labels, values, **kwargs)
+    ax.set_title("Perspective API result" if not title else title)
+    ax.set_xlabel("Score values %")
+    ax.set_ylabel("Attributes")
+
+    for rect in ax.patches:
+        x_value = rect.get_width()
+        y_value = rect.get_y() + rect.get_height() / 2
+
+        space = 5
+        ha = 'left'
+        if x_value < 0:
+            space *= -1
+            ha = 'right'
+        label = "{:.1f}%".format(x_value)
+
+        ax.annotate(label, (x_value, y_value), xytext=(space, 0), textcoords="offset points", va='center', ha=ha)
+
+    ax.set_xticks([0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+    if grid_lines:
+        # The visibility is passed positionally, it was renamed from `b` to `visible` in matplotlib 3.5.
+        ax.grid(True, color='grey', linestyle='-', linewidth=0.5, alpha=0.2)
+
+class ChartRenderer:
+    """
+    Renders bar charts of results to files with the Agg backend, without pyplot. A renderer draws every chart on the same figure, which is cleared
+    after each chart, so rendering any number of charts neither accumulates figures nor pays for setting up a new one every time. A renderer
+    mustn't be used by several threads at once; `utils.save_graph` keeps one per thread.
+
+    Parameters
+    -----------
+    figsize: :class:`tuple[float, float]`
+        The size of the charts in inches. Default is `(15, 6)`.
+    dpi: :class:`float`
+        The resolution of the charts in dots per inch. Default is `80`.
+    """
+    def __init__(self, figsize: tuple[float, float] = FIGSIZE, dpi: float = DPI) -> None:
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+
+    def render(self, scores: Mapping[str, float], filename: str, title: Optional[str] = None, grid_lines: bool = False, format: Optional[str] = None, dpi: Optional[float] = None, **kwargs) -> None:
+        """
+        Draws a chart of `scores`, a mapping of attributes and their score values as percents, and saves it to `filename`.
+
+        Parameters
+        -----------
+        scores: :class:`Mapping[str, float]`
+            The scores.
+        filename: :class:`str`
+            The path of the file.
+        title: :class:`Optional[str]`
+            The title of the chart. Default is "Perspective API result".
+        grid_lines: :class:`bool`
+            Whether the chart should have grid lines or not. Default is `False`.
+        format: :class:`Optional[str]`
+            The format of the file, such as "png", "svg" or "pdf". If `None`, it's taken from the extension of `filename`. Default is `None`.
+        dpi: :class:`Optional[float]`
+            The resolution of the file. If `None`, the resolution of the renderer is used. Default is `None`.
+        **kwargs
+            Other keyword arguments that belong to `matplotlib.axes.Axes.barh` function; such as `height`, `color` etc.
+        """
+        try:
+            draw(self.figure.add_subplot(111), scores, title, grid_lines, **kwargs)
+            self.figure.savefig(filename, format=format, dpi=dpi or "figure", bbox_inches='tight')
+        finally:
+            self.figure.clear()
+
+_local = threading.local()
+
+def renderer() -> ChartRenderer:
+    """
+    Returns the renderer of the current thread, which is created the first time it's needed.
+    """
+    try:
+        return _local.renderer
+    except AttributeError:
+        _local.renderer = ChartRenderer()
+        return _local.renderer
+
+class ChartResult(NamedTuple):
+    """
+    The outcome of rendering the chart of a response: the paths of the files which have been saved, a file per format, or the error message if
+    the chart couldn't be rendered.
+    """
+    name: str
+    paths: tuple[str, ...]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def _render(task: tuple) -> ChartResult:
+    # Runs in the worker processes, which are only sent the scores as a plain dictionary along with the options.
+    name, scores, paths, title, grid_lines, dpi, kwargs = task
+    if scores is None:
+        return ChartResult(name, (), "EmptyResponse: The response couldn't be analyzed or is empty.")
+    chart_renderer = renderer()
+    try:
+        for path in paths:
+            chart_renderer.render(scores, path, title, grid_lines, format=os.path.splitext(path)[1][1:], dpi=dpi, **kwargs)
+    except Exception as exceptionDetails:
+        return ChartResult(name, (), f"{type(exceptionDetails).__name__}: {exceptionDetails}")
+    return ChartResult(name, tuple(paths))
+
+def render_many(scores: Sequence[Optional[Mapping[str, float]]], out_dir: str, names: Iterable[str], formats: Sequence[str] = ("png",), dpi: Optional[float] = None, max_workers: Optional[int] = None, title: Optional[str] = None, grid_lines: bool = False, **kwargs) -> list[ChartResult]:
+    """
+    Renders a chart of each of `scores` to `out_dir` in every format of `formats`, across a pool of `max_workers` processes, and returns the outcome
+    of every chart in the same order. `None` scores get a failed result. See `utils.render_graphs`.
+    """
+    tasks = [
+        (name, None if entry is None else dict(entry), [os.path.join(out_dir, f"{name}.{format}") for format in formats], title, grid_lines, dpi, kwargs)
+        for entry, name in zip(scores, names)
+    ]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        return [_render(task) for task in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Tasks are sent in chunks, so that every worker gets a few of them at a time without waiting for the next one after each chart.
+    with ProcessPoolExecutor(max_workers) as executor:
+        return list(executor.map(_render, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
@@ -0,0 +1,116 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Callable, Iterator, Literal, Union
+
+import re
+
+# The maximum size of the text of a single request that Perspective API accepts, in bytes of UTF-8.
+MAX_TEXT_BYTES = 20480
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+|\n\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+Reducer = Union[Literal["max", "mean", "weighted"], Callable[[list[tuple[float, int]]], float]]
+
+def _check_reducer(reducer: Reducer) -> None:
+    """
+    Raises `ValueError` if `reducer` is neither one of the reducers of `reduce_scores` nor a function.
+    """
+    if not callable(reducer) and reducer not in ("max", "mean", "weighted"):
+        raise ValueError("reducer can be either \"max\", \"mean\", \"weighted\" or a function.")
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+def _pieces(text: str, begin: int, end: int, separator: re.Pattern) -> Iterator[tuple[int, int]]:
+    # Separators stay at the end of the piece before them, so that the pieces cover the text without gaps.
+    start = begin
+    for match in separator.finditer(text, begin, end):
+        if match.end() > start:
+            yield start, match.end()
+            start = match.end()
+    if start < end:
+        yield start, end
+
+def _split(text: str, begin: int, end: int, max_bytes: int, separators: tuple[re.Pattern, ...]) -> Iterator[tuple[int, int]]:
+    if _size(text[begin:end]) <= max_bytes:
+        yield begin, end
+        return
+    if not separators:
+        # A single word longer than the limit is cut between characters, never inside the bytes of a character.
+        start, size = begin, 0
+        for index in range(begin, end):
+            character = _size(text[index])
+            if size + character > max_bytes:
+                yield start, index
+                start, size = index, 0
+            size += character
+        yield start, end
+        return
+    for piece_begin, piece_end in _pieces(text, begin, end, separators[0]):
+        yield from _split(text, piece_begin, piece_end, max_bytes, separators[1:])
+
+def split_text(text: str, max_bytes: int = MAX_TEXT_BYTES) -> list[tuple[int, int]]:
+    """
+    Splits `text` into chunks of at most `max_bytes` bytes of UTF-8, and returns the `(begin, end)` character offsets of each chunk. Chunks end at
+    sentence boundaries where possible, then at whitespace, and only a single word longer than the limit is cut between characters. Chunks which
+    only contain whitespace are left out.
+
+    Parameters
+    -----------
+    text: :class:`str`
+        The text to split.
+    max_bytes: :class:`int`
+        The maximum size of a chunk. Default is the limit of Perspective API, 20 KB.
+
+    Returns
+    --------
+    :class:`list[tuple[int, int]]`: The offsets of the chunks, in order.
+    """
+    if max_bytes < 4:
+        raise ValueError("max_bytes must be at least 4, the size of the longest UTF-8 character.")
+    chunks = []
+    chunk_begin = chunk_end = 0
+    size = 0
+    for begin, end in _split(text, 0, len(text), max_bytes, (_SENTENCE_END, _WHITESPACE)):
+        piece = _size(text[begin:end])
+        if size + piece > max_bytes and chunk_end > chunk_begin:
+            chunks.append((chunk_begin, chunk_end))
+            chunk_begin, size = begin, 0
+        chunk_end = end
+        size += piece
+    if chunk_end > chunk_begin:
+        chunks.append((chunk_begin, chunk_end))
+    return [(begin, end) for begin, end in chunks if text[begin:end].strip()]
+
+def reduce_scores(scores: list[tuple[float, int]], reducer: Reducer = "max") -> float:
+    """
+    Aggregates the scores of the chunks of a text into a single score.
+
+    Parameters
+    -----------
+    scores: :class:`list[tuple[float, int]]`
+        The score of each chunk along with its length in characters.
+    reducer: :class:`Union[Literal["max", "mean", "weighted"], Callable[[list[tuple[float, int]]], float]]`
+        "max" takes the highest score, so that a single toxic passage makes the whole text toxic; "mean" averages the scores of the chunks;
+        "weighted" averages them weighted by the length of each chunk. A function which takes `scores` and returns the aggregated score can
+        be given as well. Default is "max".
+
+    Returns
+    --------
+    :class:`float`: The aggregated score.
+    """
+    if callable(reducer):
+        return reducer(scores)
+    if reducer == "max":
+        return max(score for score, _ in scores)
+    if reducer == "mean":
+        return sum(score for score, _ in scores) / len(scores)
+    if reducer == "weighted":
+        length = sum(length for _, length in scores)
+        return sum(score * length for score, length in scores) / length if length else 0.0
+    _check_reducer(reducer)
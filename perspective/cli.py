@@ -0,0 +1,165 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from collections import deque
+from typing import ContextManager, Iterator, Optional, TextIO
+
+from .attributes import Attributes, AttributeSet
+from .errors import *
+from .main import Client
+from .transport import API_URL
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+class _Progress:
+    """
+    Reports how many records have been scored and the throughput to stderr, at most once every `interval` seconds.
+    """
+    def __init__(self, interval: Optional[float], stream: TextIO = sys.stderr) -> None:
+        self.interval = interval
+        self.stream = stream
+        self.scored = 0
+        self.errors = 0
+        self.__start = self.__last = time.monotonic()
+
+    def update(self, failed: bool) -> None:
+        self.scored += 1
+        self.errors += failed
+        if self.interval is None:
+            return
+        now = time.monotonic()
+        if now - self.__last >= self.interval:
+            self.__last = now
+            self.report(now)
+
+    def report(self, now: Optional[float] = None) -> None:
+        elapsed = (now or time.monotonic()) - self.__start
+        rate = self.scored / elapsed if elapsed > 0 else 0.0
+        print(f"{self.scored} scored, {self.errors} failed, {elapsed:.1f}s elapsed, {rate:.1f} records/s", file=self.stream, flush=True)
+
+def _open(path: str, mode: str) -> ContextManager[TextIO]:
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    return open(path, mode=mode, encoding="utf-8", newline="")
+
+def _format(path: str, format: Optional[str]) -> str:
+    if format is not None:
+        return format
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def _read(file: TextIO, format: str, text_field: str) -> Iterator[dict]:
+    if format == "csv":
+        reader = csv.DictReader(file)
+        if reader.fieldnames is not None and text_field not in reader.fieldnames:
+            raise SystemExit(f"perspective: error: the input has no \"{text_field}\" column")
+        yield from reader
+        return
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise SystemExit(f"perspective: error: line {number} of the input is not valid JSON") from None
+        yield record if isinstance(record, dict) else {text_field: record}
+
+class _Writer:
+    """
+    Writes each record along with its scores, as JSON lines (the scores under "scores", the error message under "error") or as CSV (a "score_"
+    column per attribute, such as "score_TOXICITY", and an "error" column after the columns of the input). The columns of CSV output are those of
+    the first record, so a later JSON record with other fields stops the command rather than losing them.
+    """
+    def __init__(self, file: TextIO, format: str, attributes: tuple[str, ...]) -> None:
+        self.file = file
+        self.format = format
+        self.attributes = attributes
+        self.__csv = None
+        self.__fields = None
+
+    def write(self, record: dict, result: Optional[dict], error: Optional[str]) -> None:
+        if self.format == "jsonl":
+            self.file.write(json.dumps(dict(record, scores=result, error=error), ensure_ascii=False) + "\n")
+            return
+        if self.__csv is None:
+            self.__fields = set(record)
+            self.__csv = csv.DictWriter(self.file, fieldnames=[*record.keys(), *(f"score_{attribute}" for attribute in self.attributes), "error"])
+            self.__csv.writeheader()
+        unknown = set(record) - self.__fields
+        if unknown:
+            raise SystemExit(f"perspective: error: a record has fields which the first one doesn't have, so they can't be written as CSV: {', '.join(sorted(map(str, unknown)))}")
+        self.__csv.writerow({**record, **{f"score_{attribute}": score for attribute, score in (result or {}).items()}, "error": error or ""})
+
+def score(args: argparse.Namespace) -> int:
+    token = args.token or os.environ.get("PERSPECTIVE_API_KEY")
+    if not token:
+        raise SystemExit("perspective: error: an API key is required, pass it with --token or the PERSPECTIVE_API_KEY environment variable")
+    try:
+        attributes = AttributeSet(args.attributes.split(",") if args.attributes else Attributes.Production, skip_on_unknown=args.skip_on_unknown)
+    except (MissingAttributes, UnknownAttribute, InvalidFormat) as exceptionDetails:
+        raise SystemExit(f"perspective: error: {exceptionDetails}") from None
+
+    client = Client(token=token, qps=args.qps, burst=args.burst, base_url=args.base_url, transport=args.transport, pool_size=args.workers)
+    input_format = _format(args.input, args.input_format)
+    progress = _Progress(None if args.quiet else args.progress)
+    with _open(args.input, "r") as input_file, _open(args.output, "w") as output_file:
+        output_format = args.output_format or (input_format if args.output == "-" else _format(args.output, None))
+        writer = _Writer(output_file, output_format, attributes.names)
+        # Records are kept only while their texts are in flight, results come back in the same order as the texts are taken.
+        records = deque()
+
+        def texts() -> Iterator[str]:
+            for record in _read(input_file, input_format, args.text_field):
+                records.append(record)
+                yield str(record.get(args.text_field) or "")
+
+        for _, result in client.analyze_stream(texts(), attributes, args.language, window=args.workers, ordered=True, skip_on_lang=args.skip_on_lang):
+            record = records.popleft()
+            if isinstance(result, InvalidToken):
+                raise SystemExit(f"perspective: error: {result}")
+            failed = isinstance(result, Exception)
+            writer.write(record, None if failed else result, f"{type(result).__name__}: {result}" if failed else None)
+            progress.update(failed)
+    if not args.quiet:
+        progress.report()
+    return 0
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="perspective", description="Command-line interface of perspective.py, the Perspective API wrapper.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_score = commands.add_parser("score", help="score the texts of a JSON lines or CSV file", description=(
+        "Scores the texts of a JSON lines or CSV file and writes each record along with its scores as it goes, so files of any size are scored in "
+        "constant memory. Records whose text can't be analyzed are written with an error message instead of scores."
+    ))
+    parser_score.add_argument("input", help="the file to score, or - to read from stdin")
+    parser_score.add_argument("-o", "--output", default="-", help="the file to write the results to, or - for stdout (default)")
+    parser_score.add_argument("--input-format", choices=["jsonl", "csv"], help="the format of the input, guessed from its extension by default")
+    parser_score.add_argument("--output-format", choices=["jsonl", "csv"], help="the format of the output, guessed from its extension or same as the input by default")
+    parser_score.add_argument("-f", "--text-field", default="text", help="the field or column which contains the text (default: text)")
+    parser_score.add_argument("-a", "--attributes", help="comma-separated attributes or attribute groups to score (default: Production)")
+    parser_score.add_argument("-l", "--language", help="the language of the texts, detected by the API for each text by default")
+    parser_score.add_argument("--skip-on-lang", action="store_true", help="skip the attributes which don't support the language of a text")
+    parser_score.add_argument("--skip-on-unknown", action="store_true", help="skip unknown attributes instead of failing")
+    parser_score.add_argument("-w", "--workers", type=int, default=8, help="how many requests to have in flight at once (default: 8)")
+    parser_score.add_argument("--qps", type=float, help="the maximum number of requests per second")
+    parser_score.add_argument("--burst", type=int, help="how many requests may be sent at once when --qps is set")
+    parser_score.add_argument("--token", help="the API key, read from the PERSPECTIVE_API_KEY environment variable by default")
+    parser_score.add_argument("--base-url", default=API_URL, help="the root URL of the API, for testing against a local server")
+    parser_score.add_argument("--transport", choices=["discovery", "http"], default="http", help="what to send the requests through (default: http)")
+    parser_score.add_argument("--progress", type=float, default=5.0, metavar="SECONDS", help="how often to report progress on stderr (default: 5)")
+    parser_score.add_argument("-q", "--quiet", action="store_true", help="don't report progress")
+    parser_score.set_defaults(function=score)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "workers", 1) < 1:
+        parser.error("--workers must be at least 1")
+    return args.function(args)
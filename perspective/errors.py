@@ -1,3 +1,5 @@
+from typing import Optional
+
 class EmptyText(Exception):
     pass
 
@@ -14,7 +16,10 @@ class InvalidToken(Exception):
     pass
 
 class HTTPException(Exception):
-    pass
+    def __init__(self, *args, status: Optional[int] = None) -> None:
+        super().__init__(*args)
+        # The HTTP status of the error returned by the API, or None if the API couldn't be reached or didn't return a status.
+        self.status = status
 
 class UnsupportedLanguage(Exception):
     pass
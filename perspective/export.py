@@ -0,0 +1,185 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Hashable, Iterable, Iterator, Mapping, Optional, Union
+
+from .errors import *
+from .results import AnalysisResult
+from .storage import text_hash
+from .utils import Utils
+
+import gzip
+import io
+import json
+import os
+
+def _part(filename: str, number: int) -> str:
+    # The first part is the file itself, the next ones are numbered before the extension: results.jsonl, results.1.jsonl, results.2.jsonl...
+    if number == 0:
+        return filename
+    root, compressed = (filename[:-3], ".gz") if filename.endswith(".gz") else (filename, "")
+    root, extension = os.path.splitext(root)
+    return f"{root}.{number}{extension}{compressed}"
+
+def _parts(filename: str) -> Iterator[str]:
+    number = 0
+    while os.path.exists(_part(filename, number)):
+        yield _part(filename, number)
+        number += 1
+
+def _error(result: Union[Mapping, Exception, None]) -> Optional[str]:
+    if isinstance(result, Exception):
+        return f"{type(result).__name__}: {result}"
+    return None if result else "EmptyResponse: The response is empty."
+
+class JSONLinesWriter:
+    """
+    Appends results to a JSON lines file, a compact JSON object per line, through a buffer, so that any number of results is exported in
+    constant memory. Every line has the id of the text under "id", the SHA-256 of the text under "text_hash", the scores as percents under
+    "scores", the error message of failed results under "error" and, if `include_raw` is set, the raw response under "raw".
+
+    ```py
+    with JSONLinesWriter("results.jsonl.gz", max_bytes=100 * 2**20) as writer:
+        for text, result in client.analyze_stream(texts):
+            writer.write(result, text=text)
+    ```
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the file. It's created if it doesn't exist, and appended to if it does.
+    compress: :class:`Optional[bool]`
+        Whether to compress the file with gzip. If `None`, it's compressed if `filename` ends with ".gz". Default is `None`.
+    max_bytes: :class:`Optional[int]`
+        The size at which a file is closed and the next one is started, in bytes before compression. The files after the first one are numbered
+        before the extension: `results.jsonl`, `results.1.jsonl`, `results.2.jsonl`... Appending to a compressed export starts a new file. If
+        `None`, a single file is written. Default is `None`.
+    include_raw: :class:`bool`
+        Whether to write the raw response too, for results which have it: raw responses and `AnalysisResult`s with `keep_raw`. Default is `False`.
+    buffer_size: :class:`int`
+        How many bytes to buffer before writing to the file. Default is 1 MiB.
+    compresslevel: :class:`int`
+        The gzip compression level, from 1 (fastest) to 9 (smallest). Default is `6`.
+    """
+    def __init__(self, filename: str, compress: Optional[bool] = None, max_bytes: Optional[int] = None, include_raw: bool = False, buffer_size: int = 2 ** 20, compresslevel: int = 6) -> None:
+        if filename.replace(" ","") == "":
+            raise EmptyFileName("The filename cannot be an empty string.") from None
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1.")
+        self.filename = filename
+        self.compress = filename.endswith(".gz") if compress is None else compress
+        self.max_bytes = max_bytes
+        self.include_raw = include_raw
+        self.buffer_size = buffer_size
+        self.compresslevel = compresslevel
+        self.written = 0
+        self.paths = []
+        # Appending continues the last part of a previous export. The size of a compressed part before compression isn't known without reading it
+        # all, so a new part is started after it instead.
+        self.__number = max(0, len(list(_parts(filename))) - 1) if max_bytes is not None else 0
+        if max_bytes is not None and self.compress and os.path.exists(_part(filename, self.__number)) and os.path.getsize(_part(filename, self.__number)):
+            self.__number += 1
+        self.__file = None
+        self.__size = 0
+        self.__open()
+
+    def __enter__(self) -> "JSONLinesWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __open(self) -> None:
+        path = _part(self.filename, self.__number)
+        self.__size = os.path.getsize(path) if not self.compress and os.path.exists(path) else 0
+        raw = gzip.open(path, mode="ab", compresslevel=self.compresslevel) if self.compress else open(path, mode="ab", buffering=0)
+        self.__file = io.BufferedWriter(raw, buffer_size=self.buffer_size)
+        self.paths.append(path)
+
+    def __rotate(self) -> None:
+        self.__file.close()
+        self.__number += 1
+        self.__open()
+
+    def __line(self, result: Union[Mapping, Exception, None], scores: Optional[Mapping[str, float]], id: Optional[Hashable], text: Optional[str]) -> bytes:
+        record = {"id": id, "text_hash": None if text is None else text_hash(text), "scores": None if scores is None else dict(scores), "error": None if scores is not None else _error(result)}
+        if self.include_raw:
+            record["raw"] = result.raw if isinstance(result, AnalysisResult) else result if isinstance(result, Mapping) and "attributeScores" in result else None
+        return (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+    def __write(self, line: bytes) -> None:
+        if self.max_bytes is not None and self.__size and self.__size + len(line) > self.max_bytes:
+            self.__rotate()
+        self.__file.write(line)
+        self.__size += len(line)
+        self.written += 1
+
+    def write(self, result: Union[Mapping, Exception, None], id: Optional[Hashable] = None, text: Optional[str] = None) -> None:
+        """
+        Writes a result.
+
+        Parameters
+        -----------
+        result: :class:`Union[Mapping, Exception, None]`
+            What `analyze` returned, raw or not, or the exception that took the place of the result of a text in `analyze_many`, `analyze_batch`
+            or `analyze_stream`.
+        id: :class:`Optional[Hashable]`
+            The id of the text, which must be serializable to JSON. Default is `None`.
+        text: :class:`Optional[str]`
+            The text itself, to write the hash of. Default is `None`.
+        """
+        self.write_many([result], None if id is None else [id], None if text is None else [text])
+
+    def write_many(self, results: Iterable[Union[Mapping, Exception, None]], ids: Optional[Iterable[Hashable]] = None, texts: Optional[Iterable[str]] = None) -> int:
+        """
+        Writes many results, such as the list that `analyze_many` or `analyze_batch` returned, along with the id and the text of each.
+
+        Returns
+        --------
+        :class:`int`: How many results have been written.
+        """
+        results = list(results)
+        ids = [None] * len(results) if ids is None else list(ids)
+        texts = [None] * len(results) if texts is None else list(texts)
+        if not len(ids) == len(texts) == len(results):
+            raise ValueError("ids and texts must have an item for every result.")
+        for result, scores, id, text in zip(results, Utils.normalize_many(results), ids, texts):
+            self.__write(self.__line(result, scores, id, text))
+        return len(results)
+
+    def flush(self) -> None:
+        """
+        Writes the buffered results to the file. The gzip stream is only complete once the writer is closed.
+        """
+        self.__file.flush()
+
+    def close(self) -> None:
+        """
+        Writes the buffered results and closes the file.
+        """
+        if self.__file is not None and not self.__file.closed:
+            self.__file.close()
+
+def read_json_lines(filename: str) -> Iterator[dict]:
+    """
+    Yields the records that a :class:`JSONLinesWriter` has written to `filename`, including the numbered files it has rotated to, one at a time.
+    Files compressed with gzip are decompressed, whatever their extension.
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the first file.
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"No such file: '{filename}'")
+    for path in _parts(filename):
+        # Files are recognized by the magic number of gzip rather than their extension, since the writer compresses any file with `compress=True`.
+        with open(path, mode="rb") as file:
+            compressed = file.read(2) == b"\x1f\x8b"
+        with (gzip.open(path, mode="rt", encoding="utf-8") if compressed else open(path, mode="r", encoding="utf-8")) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,192 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from collections import deque
+from typing import Hashable, Iterable, Iterator, Optional, Union
+
+from .attributes import Attributes
+from .errors import *
+from .main import Client
+
+import json
+import time
+
+def _transient(exception: Exception) -> bool:
+    # Errors without a status are raised when the API couldn't be reached; other errors than 429 and 5xx would be returned again.
+    return isinstance(exception, HTTPException) and (exception.status is None or exception.status == 429 or exception.status >= 500)
+
+class Job:
+    """
+    A resumable batch job which analyzes a large number of texts with a :class:`perspective.Client` and records the result of every item in a
+    SQLite3 checkpoint as it goes. When the job is run again with the same checkpoint, for example after a crash, items that have already been
+    analyzed are skipped, so no request is paid for twice. Items that fail with a transient `HTTPException` (the API couldn't be reached, or
+    responded with a 429 or 5xx status) are retried with an exponential backoff; items that fail for any other reason, such as a 400 error of the
+    API, `EmptyText` or `UnsupportedLanguage`, are recorded as failed and not retried. An `InvalidToken` error stops the job.
+
+    ```py
+    job = Job(client, "backfill.sqlite3", attributes=Attributes.Production, language="en", skip_on_lang=True)
+    job.run((row["id"], row["text"]) for row in rows)
+    for id, result in job.results():
+        ...
+    ```
+
+    Parameters
+    -----------
+    client: :class:`perspective.Client`
+        The client to analyze the texts with. Its rate limiter and cache, if any, are used as well.
+    path: :class:`str`
+        The path of the checkpoint database. It's created if it doesn't exist.
+    attributes: :class:`list[str]`
+        The attributes to analyze the texts for. Default is `perspective.Attributes.Production`.
+    language: :class:`Optional[str]`
+        The language of the texts. If `None`, language will be automatically detected for each text. Default is `None`.
+    window: :class:`int`
+        The maximum number of requests to have in flight at once. With the "http" transport, at most the `pool_size` of the client. Default is `8`.
+    retries: :class:`int`
+        How many times to retry an item which has failed with a transient `HTTPException`. Default is `3`.
+    backoff: :class:`float`
+        How many seconds to wait before the first retry; the wait is doubled before each further retry. Default is `1.0`.
+    checkpoint_every: :class:`int`
+        How many results to write to the checkpoint in a single transaction. At most this many results are lost, and paid for again, if the process
+        crashes. Default is `100`.
+    \*\*options
+        The same options that `perspective.Client.analyze` accepts.
+    """
+    def __init__(self, client: Client, path: str, attributes: list[str] = Attributes.Production, language: Optional[str] = None, window: int = 8, retries: int = 3, backoff: float = 1.0, checkpoint_every: int = 100, **options) -> None:
+        if retries < 0:
+            raise ValueError("retries cannot be negative.")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1.")
+        import sqlite3 as sql
+
+        self.client = client
+        self.path = path
+        self.attributes = attributes
+        self.language = language
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint_every = checkpoint_every
+        self.options = options
+        self.__connection = sql.connect(path, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, result TEXT, error TEXT, text TEXT, attempts INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self.__pending = 0
+
+    def __enter__(self) -> "Job":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Writes the remaining results to the checkpoint and closes it.
+        """
+        self.__commit()
+        self.__connection.close()
+
+    def __commit(self) -> None:
+        if self.__connection.in_transaction:
+            self.__connection.execute("COMMIT")
+        self.__pending = 0
+
+    def __record(self, id: str, text: str, result: Union[dict, Exception], attempts: int) -> str:
+        if not self.__connection.in_transaction:
+            self.__connection.execute("BEGIN")
+        if not isinstance(result, Exception):
+            # Compact results are mappings rather than dictionaries, which json can't encode.
+            status, row = "done", (json.dumps(dict(result), separators=(",", ":"), ensure_ascii=False), None, None)
+        elif _transient(result) and attempts <= self.retries:
+            # The text is only kept for items that are going to be retried, and removed once they're done.
+            status, row = "retry", (None, f"{type(result).__name__}: {result}", text)
+        else:
+            status, row = "failed", (None, f"{type(result).__name__}: {result}", None)
+        self.__connection.execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)", (id, status, *row, attempts, time.time()))
+        self.__pending += 1
+        if self.__pending >= self.checkpoint_every:
+            self.__commit()
+        return status
+
+    def __analyze(self, items: Iterable[tuple[str, str, int]], counts: dict) -> None:
+        in_flight = deque()
+
+        def texts() -> Iterator[str]:
+            for id, text, attempts in items:
+                in_flight.append((id, attempts))
+                yield text
+
+        for text, result in self.client.analyze_stream(texts(), self.attributes, self.language, window=self.window, ordered=True, **self.options):
+            id, attempts = in_flight.popleft()
+            if isinstance(result, InvalidToken):
+                self.__commit()
+                raise result
+            status = self.__record(id, text, result, attempts + 1)
+            if status != "retry":
+                counts[status] += 1
+
+    def run(self, items: Iterable[tuple[Hashable, str]]) -> dict:
+        """
+        Analyzes the texts of `items` which haven't been analyzed yet, along with the items left to be retried by a previous run, and records their
+        results in the checkpoint.
+
+        Parameters
+        -----------
+        items: :class:`Iterable[tuple[Hashable, str]]`
+            `(id, text)` pairs. Ids are stored as strings and must be unique within the job. The iterable is consumed lazily.
+
+        Returns
+        --------
+        :class:`dict`: How many items have been analyzed (`done`), have failed for good (`failed`), are left to be retried by the next run (`retry`)
+        and have been skipped because they had already been analyzed (`skipped`) in this run.
+        """
+        counts = {"done": 0, "failed": 0, "retry": 0, "skipped": 0}
+
+        def unfinished() -> Iterator[tuple[str, str, int]]:
+            for id, text in items:
+                id = str(id)
+                row = self.__connection.execute("SELECT status, attempts FROM items WHERE id = ?", (id,)).fetchone()
+                if row is not None and row[0] != "retry":
+                    counts["skipped"] += 1
+                    continue
+                yield id, text, 0 if row is None else row[1]
+
+        try:
+            self.__analyze(unfinished(), counts)
+            for attempt in range(self.retries):
+                self.__commit()
+                retry = self.__connection.execute("SELECT id, text, attempts FROM items WHERE status = 'retry'").fetchall()
+                if not retry:
+                    break
+                time.sleep(self.backoff * 2 ** attempt)
+                self.__analyze(retry, counts)
+        finally:
+            self.__commit()
+        counts["retry"] = self.stats()["retry"]
+        return counts
+
+    def results(self) -> Iterator[tuple[str, dict]]:
+        """
+        Yields the id and the result of every item which has been analyzed so far.
+        """
+        for id, result in self.__connection.execute("SELECT id, result FROM items WHERE status = 'done'"):
+            yield id, json.loads(result)
+
+    def failures(self) -> Iterator[tuple[str, str]]:
+        """
+        Yields the id and the error message of every item which has failed for good, or is waiting to be retried.
+        """
+        yield from self.__connection.execute("SELECT id, error FROM items WHERE status != 'done'")
+
+    def stats(self) -> dict:
+        """
+        Returns how many items of the job are done, have failed for good and are waiting to be retried, across all runs.
+        """
+        counts = dict(self.__connection.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return {"done": counts.get("done", 0), "failed": counts.get("failed", 0), "retry": counts.get("retry", 0)}
@@ -0,0 +1,118 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import NamedTuple, Optional
+
+import difflib
+import functools
+import re
+import threading
+
+class Language(NamedTuple):
+    """
+    A language as the API expects it: `code` is the code to send in requests, and `name` is the English name of the language.
+    """
+    code: str
+    name: str
+
+# Common names of languages which aren't the names pycountry uses, and deprecated ISO 639-1 codes which are still seen in the wild.
+_ALIASES = {
+    "greek": "el",
+    "farsi": "fa",
+    "mandarin": "zh",
+    "cantonese": "zh",
+    "castilian": "es",
+    "flemish": "nl",
+    "iw": "he",
+    "in": "id",
+    "ji": "yi",
+}
+_BCP47_TAG = re.compile(r"^([A-Za-z]{2,3})((?:[-_][A-Za-z0-9]{1,8})+)$")
+
+_tables = None
+_tables_lock = threading.Lock()
+
+def _get_tables() -> tuple[dict[str, Language], tuple[str, ...]]:
+    """
+    Returns the lookup table of languages by their lowercase codes and names, and the lowercase names to match misspelled names against. Both are
+    built from pycountry once per process, the first time a language is looked up.
+    """
+    global _tables
+    if _tables is not None:
+        return _tables
+    with _tables_lock:
+        if _tables is None:
+            from pycountry import languages
+
+            table = {}
+            names = []
+            for entry in languages:
+                language = Language(getattr(entry, "alpha_2", entry.alpha_3), entry.name)
+                for field in ("name", "common_name", "inverted_name"):
+                    value = getattr(entry, field, None)
+                    if value is not None:
+                        table.setdefault(value.lower(), language)
+                        names.append(value.lower())
+                # Codes take precedence over names, so that e.g. "is" is always Icelandic.
+                for field in ("alpha_2", "alpha_3", "bibliographic"):
+                    value = getattr(entry, field, None)
+                    if value is not None:
+                        table[value.lower()] = language
+            for alias, code in _ALIASES.items():
+                table.setdefault(alias, table[code])
+            _tables = (table, tuple(dict.fromkeys(names)))
+    return _tables
+
+@functools.lru_cache(maxsize=1024)
+def _closest_language(name: str) -> Optional[Language]:
+    table, names = _get_tables()
+    try:
+        return table[difflib.get_close_matches(name, names, n=1)[0]]
+    except IndexError:
+        return None
+
+def get_language(language: str) -> Optional[Language]:
+    """
+    Looks up a language by its ISO 639 code (alpha-2 or alpha-3), its English name or a common alias, in any case, correcting small spelling mistakes
+    in names. BCP-47 tags with a region or script, such as "pt-BR" or "zh-Hant", are kept as they are if their language is known.
+
+    Parameters
+    -----------
+    language: :class:`str`
+        The code or the name of the language.
+
+    Returns
+    --------
+    :class:`Optional[Language]`: The language, or `None` if no language matches.
+    """
+    table = _get_tables()[0]
+    key = language.strip().lower()
+    try:
+        return table[key]
+    except KeyError:
+        pass
+    tag = _BCP47_TAG.match(language.strip())
+    if tag is not None:
+        primary = table.get(tag.group(1).lower())
+        if primary is None:
+            return None
+        subtags = [subtag.upper() if len(subtag) == 2 else subtag.title() if len(subtag) == 4 else subtag.lower() for subtag in re.split(r"[-_]", tag.group(2))[1:]]
+        return Language("-".join([primary.code, *subtags]), primary.name)
+    return _closest_language(key)
+
+def get_language_code(language: str) -> Optional[str]:
+    """
+    Returns the code of `language` to send to the API, or `None` if it's unknown. Accepts the same values as `get_language`.
+    """
+    result = get_language(language)
+    return result.code if result is not None else None
+
+def get_language_name(language: str) -> Optional[str]:
+    """
+    Returns the English name of `language`, or `None` if it's unknown. Accepts the same values as `get_language`.
+    """
+    result = get_language(language)
+    return result.name if result is not None else None
@@ -4,30 +4,45 @@ __license__ = "MIT"
 __copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
 __version__ = "1.0.0"
 
-from googleapiclient import discovery, errors
-from typing import Optional, Literal, Union
-from pycountry import languages
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, Literal, Union
 
-from .attributes import Attributes, all_attrs, all_attr_grps
+from .attributes import Attributes, AttributeSet, language_support
 from .errors import *
+from .languages import get_language_code, get_language_name
+from .cache import Cache, SingleFlight
+from .metrics import Metrics
+from .chunking import MAX_TEXT_BYTES, Reducer, _check_reducer, reduce_scores, split_text
+from .ratelimit import RateLimiter
+from .results import AnalysisResult
+from .transport import API_URL, DISCOVERY_URL, MAX_BATCH_LIMIT, Transport, TransportError, DiscoveryTransport, HTTPTransport, _set_discovery_document
 from .utils import Utils as utils
 
-import httplib2
-import difflib
+import re
+import json
 import logging
 import sys
 import os
 import time
 
-class Client:
+logger = logging.getLogger(__name__)
+
+_UNSUPPORTED_LANGUAGE = re.compile(r"Attribute (\S+) does not support request languages: ([\w-]+)")
+
+class _BaseClient:
+    """
+    Logging setup, argument handling and response handling shared by :class:`Client` and :class:`perspective.AsyncClient`.
+    Subclasses only need to implement the transport that actually sends the request.
+    """
     @staticmethod
-    def __supports_ansi_esc() -> bool:
+    def _supports_ansi_esc() -> bool:
         plat = sys.platform
         supported_platform = plat != 'Pocket PC' and (plat != 'win32' or 'ANSICON' in os.environ)
         is_a_tty = hasattr(sys.stdout, 'isatty') and sys.stdout.isatty()
         return supported_platform and is_a_tty
 
-    def __init__(self, token: str, logging_level: Optional[Union[Literal["NOTSET", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"], Literal[0, 10, 20, 30, 40, 50]]] = None) -> None:
+    def __init__(self, logging_level: Optional[Union[Literal["NOTSET", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"], Literal[0, 10, 20, 30, 40, 50]]] = None, qps: Optional[float] = None, burst: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None, cache: Optional[Cache] = None, metrics: Optional[Metrics] = None) -> None:
         global logger
         logger = logging.getLogger(__name__)
         logging.basicConfig(
@@ -52,26 +67,13 @@ class Client:
         else:
             logger.setLevel(level=51)
             logger.disabled = True
-        try:
-            self.client = discovery.build(
-                "commentanalyzer",
-                "v1alpha1",
-                developerKey = token,
-                discoveryServiceUrl = "https://commentanalyzer.googleapis.com/$discovery/rest?version=v1alpha1",
-                static_discovery = False,
-            )
-        except errors.HttpError as exceptionDetails:
-            if str(exceptionDetails).startswith(f"<HttpError 400 when requesting https://commentanalyzer.googleapis.com/$discovery/rest?version=v1alpha1&key={token} returned \"API key not valid. Please pass a valid API key.\"."):
-                if self.__supports_ansi_esc():
-                    raise InvalidToken(r"The token you've entered is not a valid API key. Refer to \033[4mhttps://developers.perspectiveapi.com/s/docs-get-started\033[0m to get a new API key.").with_traceback(exceptionDetails.__traceback__) from None
-                else:
-                    raise InvalidToken("The token you've entered is not a valid API key. Refer to https://developers.perspectiveapi.com/s/docs-get-started to get a new API key.").with_traceback(exceptionDetails.__traceback__) from None
-            else:
-                raise HTTPException(str(exceptionDetails)).with_traceback(exceptionDetails.__traceback__) from None
-        except httplib2.error.ServerNotFoundError as exceptionDetails:
-            raise HTTPException("Unable to connect to the API. Please check your internet connection.").with_traceback(exceptionDetails.__traceback__) from None
-        else:
-            self.__token = token
+        if rate_limiter is None and qps is not None:
+            rate_limiter = RateLimiter(qps=qps, burst=burst)
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        # Shared by every client in the process, so that a language rejection learned by one client is known to all of them.
+        self.language_support = language_support
 
     @property
     def logging_level(self) -> Union[int, str]:
@@ -100,75 +102,240 @@ class Client:
             logger.setLevel(level=logging.CRITICAL + 1)
             logger.disabled = True
 
-    def change_token(self, token: str) -> None:
-        if not token == self.__token:
-            try:
-                self.client = discovery.build(
-                    "commentanalyzer",
-                    "v1alpha1",
-                    developerKey = token,
-                    discoveryServiceUrl = "https://commentanalyzer.googleapis.com/$discovery/rest?version=v1alpha1",
-                    static_discovery = False,
-                )
-            except errors.HttpError as exceptionDetails:
-                if str(exceptionDetails).startswith(f"<HttpError 400 when requesting https://commentanalyzer.googleapis.com/$discovery/rest?version=v1alpha1&key={token} returned \"API key not valid. Please pass a valid API key.\"."):
-                    if self.__supports_ansi_esc():
-                        raise InvalidToken(r"The token you've entered is not a valid API key. Refer to \033[4mhttps://developers.perspectiveapi.com/s/docs-get-started\033[0m to get a new API key.").with_traceback(exceptionDetails.__traceback__) from None
-                    else:
-                        raise InvalidToken("The token you've entered is not a valid API key. Refer to https://developers.perspectiveapi.com/s/docs-get-started to get a new API key.").with_traceback(exceptionDetails.__traceback__) from None
-                else:
-                    raise HTTPException(str(exceptionDetails)).with_traceback(exceptionDetails.__traceback__) from None
-            except httplib2.error.ServerNotFoundError as exceptionDetails:
-                raise HTTPException("Unable to connect to the API. Please check your internet connection.").with_traceback(exceptionDetails.__traceback__) from None
-            else:
-                self.__token = token
+    @classmethod
+    def _invalid_token(cls) -> InvalidToken:
+        if cls._supports_ansi_esc():
+            return InvalidToken(r"The token you've entered is not a valid API key. Refer to \033[4mhttps://developers.perspectiveapi.com/s/docs-get-started\033[0m to get a new API key.")
+        else:
+            return InvalidToken("The token you've entered is not a valid API key. Refer to https://developers.perspectiveapi.com/s/docs-get-started to get a new API key.")
 
-    @staticmethod
-    def __get_language_code(language: str) -> Optional[str]:
+    def _resolve_attributes(self, attributes: Union[list[str], AttributeSet], **options) -> tuple[str, ...]:
+        """
+        Normalizes the `attributes` argument of `analyze` into the names of attributes that Perspective API accepts, expanding attribute groups,
+        correcting small spelling mistakes and skipping unknown attributes if `skip_on_unknown` is set. An `AttributeSet` is used as it is.
+        """
+        if type(attributes) is not AttributeSet:
+            attributes = AttributeSet(attributes, skip_on_unknown=bool(options.get("skip_on_unknown")))
+            for attribute in attributes.skipped:
+                logger.debug(f"Skipping \"{attribute}\" attribute since it's unknown.")
+            if self.metrics is not None and attributes.skipped:
+                self.metrics.count_many("skipped", attributes.skipped)
+        return attributes.names
+
+    def _resolve_language(self, language: Optional[str]) -> Optional[str]:
+        """
+        Converts the `language` argument of `analyze` to the language code that Perspective API accepts.
+        """
+        if not language:
+            return None
+        return get_language_code(language)
+
+    def _resolve(self, attributes: Union[list[str], AttributeSet], language: Optional[str], **options) -> tuple[tuple[str, ...], Optional[str]]:
+        """
+        Resolves both the `attributes` and the `language` arguments of `analyze`, counting the exception in the metrics if either is invalid.
+        """
         try:
-            lang_code = languages.get(alpha_2=language).alpha_2
-        except AttributeError:
-            try:
-                lang_code = languages.get(name=language).alpha_2
-            except AttributeError:
-                languages_name = []
-                for lang in languages:
-                    languages_name.append(str(lang.name))
-                try:
-                    return languages.get(name=difflib.get_close_matches(language, languages_name, n=1)[0]).alpha_2
-                except IndexError:
-                    return None
-            else:
-                return lang_code
+            return self._resolve_attributes(attributes, **options), self._resolve_language(language)
+        except Exception as exceptionDetails:
+            if self.metrics is not None:
+                self.metrics.count("errors", type(exceptionDetails).__name__)
+            raise
+
+    def _build_request(self, text: str, attributes: tuple[str, ...], language: Optional[str] = None, span_annotations: bool = False) -> dict:
+        """
+        Builds the body of a `comments:analyze` request from already resolved attributes and language code.
+        """
+        if text.replace(" ", "") == "":
+            raise EmptyText("The text cannot be empty.") from None
+
+        requestedAttributes_dict = {}
+        for attribute in attributes:
+            requestedAttributes_dict[str(attribute)] = {}
+
+        if not language:
+            analyze_request = {
+                'comment': { 'text': text},
+                'requestedAttributes': requestedAttributes_dict,
+            }
         else:
-            return lang_code
+            analyze_request = {
+                'comment': { 'text': text},
+                'requestedAttributes': requestedAttributes_dict,
+                'languages': [language]
+            }
+        if span_annotations:
+            analyze_request['spanAnnotations'] = True
+        return analyze_request
+
+    def _handle_error(self, message: str, analyze_request: dict, status: Optional[int] = None, **options) -> None:
+        """
+        Handles an error message returned by the API for `analyze_request` with the HTTP `status`. If the error is caused by an attribute not supporting the language of the
+        text and `skip_on_lang` is set, the attribute is removed from `analyze_request` so that the request can be sent again. Otherwise, raises the
+        appropriate exception.
+        """
+        match = _UNSUPPORTED_LANGUAGE.search(message)
+        if match is not None:
+            attribute, language = match.groups()
+            self.language_support.reject(attribute, language)
+            if "skip_on_lang" in options and options["skip_on_lang"] and attribute in analyze_request["requestedAttributes"]:
+                del analyze_request["requestedAttributes"][attribute]
+                logger.debug(f"Skipping \"{attribute}\" attribute since {get_language_name(language)} ({get_language_code(language)}) is not supported by the attribute.")
+                if self.metrics is not None:
+                    self.metrics.count("skipped", attribute)
+                    if analyze_request["requestedAttributes"]:
+                        self.metrics.count("retries")
+                return
+            raise UnsupportedLanguage(f"{get_language_name(language)} ({get_language_code(language)}) is not supported by \"{attribute}\" attribute.") from None
+        if "API key not valid" in message:
+            raise self._invalid_token() from None
+        if "skip_on_lang" in options and options["skip_on_lang"]:
+            raise HTTPException(message, status=status) from None
+        raise HTTPException("An unknown error occured. Please try again. Exception details: " + message, status=status) from None
+
+    def _plan_request(self, analyze_request: dict, **options) -> None:
+        """
+        Removes the attributes which are known not to support the language of `analyze_request` from it if `skip_on_lang` is set, so that the request
+        doesn't have to be sent again for each of them. Requests without a language are left as they are, since it's detected by the API.
+        """
+        if not options.get("skip_on_lang") or "languages" not in analyze_request:
+            return
+        language = analyze_request["languages"][0]
+        for attribute in list(analyze_request["requestedAttributes"]):
+            if not self.language_support.supports(attribute, language):
+                del analyze_request["requestedAttributes"][attribute]
+                logger.debug(f"Skipping \"{attribute}\" attribute since {get_language_name(language)} ({get_language_code(language)}) is not supported by the attribute.")
+                if self.metrics is not None:
+                    self.metrics.count("skipped", attribute)
+
+    def _cache_lookup(self, analyze_request: dict, **options) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Returns the cache key of `analyze_request` and the cached response for it, if the client has a cache.
+        """
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(analyze_request, **options)
+        response = self.cache.get(key)
+        if self.metrics is not None:
+            self.metrics.count("cache_misses" if response is None else "cache_hits")
+        return key, response
+
+    def _build_result(self, analyze_request: dict, response: dict, start_timestamp: float, **options) -> dict:
+        """
+        Converts the raw `response` into a dictionary of attributes and their score values as percents, or returns it unchanged if `return_raw` is set.
+        """
+        result = {}
+
+        # Attributes skipped because of their language are missing from the response, which may also come from the cache.
+        for attribute in analyze_request["requestedAttributes"].keys():
+            if str(attribute) in response['attributeScores']:
+                result[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value'])*100
+        if self.metrics is not None:
+            self.metrics.count("texts", (response.get("languages") or analyze_request.get("languages") or ["unknown"])[0])
+            self.metrics.count_many("attributes", result)
 
-    @staticmethod
-    def __get_language_name(language: str) -> Optional[str]:
         try:
-            lang_name = languages.get(alpha_2=language).name
-        except AttributeError:
-            try:
-                lang_name = languages.get(name=language).name
-            except AttributeError:
-                languages_name = []
-                for lang in languages:
-                    languages_name.append(str(lang.name))
-                try:
-                    return languages.get(name=difflib.get_close_matches(language, languages_name, n=1)[0]).name
-                except IndexError:
-                    return None
-            else:
-                return lang_name
-        else:
-            return lang_name
+            if "return_raw" in options and options["return_raw"]:
+                return response
+            if options.get("compact"):
+                return AnalysisResult(result, json.dumps(response, separators=(",", ":"), ensure_ascii=False) if options.get("keep_raw") else None)
+            return result
+        except Exception:
+            pass
+        finally:
+            # The message is only built if it's going to be logged, which it isn't by default.
+            if logger.isEnabledFor(logging.INFO):
+                if result != {}:
+                    highest = utils.get_highest(result)
+                    logger.info("Perspective API text analysis has been completed. Request took {:.2f} seconds to process. ".format(time.time() - start_timestamp) + "The attribute with highest score value is {} with a score value of {:.2f}.".format(highest, result[highest]))
+                else:
+                    logger.info("However, the response was empty because none of the requested attributes support the language of the text entered.")
+
+class Client(_BaseClient):
+    """
+    The client which sends requests to Perspective API.
+
+    Parameters
+    -----------
+    token: :class:`str`
+        Your Perspective API key.
+    logging_level: :class:`Optional[Union[str, int]]`
+        The logging level, such as "INFO" or `20`. Default is `None`, which disables logging.
+    qps: :class:`Optional[float]`
+        If set, at most this many requests are sent per second, on average, by all the threads using this client. Default is `None` (no limit).
+    burst: :class:`Optional[int]`
+        How many requests may be sent at once when `qps` is set. Default is `1`.
+    rate_limiter: :class:`Optional[perspective.RateLimiter]`
+        A rate limiter to send every request through instead of creating one from `qps` and `burst`; pass the same limiter, or a
+        :class:`perspective.SharedRateLimiter`, to several clients or processes to make them share a quota. Default is `None`.
+    static_discovery: :class:`bool`
+        Whether to use the discovery document of the API bundled with the library, which makes creating a client a local operation. If `False`, the
+        latest document is downloaded and the token is validated by the API first, see `refresh_discovery`. Default is `True`.
+    base_url: :class:`str`
+        The root URL of the API. Default is the Perspective API itself, it only needs to be changed for testing against a local server.
+    transport: :class:`Union[Literal["discovery", "http"], perspective.transport.Transport]`
+        What to send the requests through. "discovery" uses `googleapiclient`, "http" uses :class:`perspective.transport.HTTPTransport`, which posts
+        the requests directly over keep-alive connections with less overhead per request. A transport object can be passed to configure it.
+        Default is "discovery".
+    cache: :class:`Optional[perspective.cache.Cache]`
+        A cache to store responses in, such as :class:`perspective.cache.MemoryCache` or :class:`perspective.cache.SQLiteCache`. Texts that have
+        already been analyzed for the same attributes, language and options are answered from the cache without sending a request. Default is `None`.
+    coalesce: :class:`bool`
+        Whether to coalesce identical requests made from several threads at the same time: while a request for a text is in flight, the other
+        threads analyzing the same text for the same attributes, language and options wait for its response instead of sending their own. The number
+        of requests saved is available from `client.single_flight.stats()`. Default is `False`.
+    metrics: :class:`Optional[perspective.metrics.Metrics]`
+        Metrics to count the requests, texts, attributes, errors, retries, skipped attributes and cache hits of the client in, and to measure the
+        latency of the phases of its requests with. If `transport` is a :class:`perspective.transport.Transport` object, its `metrics` are replaced
+        with these, so a transport shared by several clients measures latencies into the metrics of the client created last. Default is `None`,
+        which doesn't measure anything.
+    pool_size: :class:`int`
+        The number of connections of the pool of the "http" transport, which is also the maximum number of requests it has in flight at once: the
+        `max_workers` of `analyze_many`, the `window` of `analyze_stream` and of :class:`perspective.jobs.Job` and the like can't send more requests
+        at once than this. It's ignored by the other transports. Default is `10`.
+    """
+    def __init__(self, token: str, logging_level: Optional[Union[Literal["NOTSET", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"], Literal[0, 10, 20, 30, 40, 50]]] = None, qps: Optional[float] = None, burst: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None, static_discovery: bool = True, base_url: str = API_URL, transport: Union[Literal["discovery", "http"], Transport] = "discovery", cache: Optional[Cache] = None, coalesce: bool = False, metrics: Optional[Metrics] = None, pool_size: int = 10) -> None:
+        super().__init__(logging_level=logging_level, qps=qps, burst=burst, rate_limiter=rate_limiter, cache=cache, metrics=metrics)
+        self.single_flight = SingleFlight() if coalesce else None
+        if not static_discovery:
+            self.refresh_discovery(token=token)
+        if transport == "discovery":
+            transport = DiscoveryTransport(base_url=base_url)
+        elif transport == "http":
+            transport = HTTPTransport(base_url=base_url, pool_size=pool_size)
+        elif not isinstance(transport, Transport):
+            raise ValueError("transport can be either \"discovery\", \"http\" or a perspective.transport.Transport object.")
+        if metrics is not None:
+            # The client takes the transport over, see the `metrics` parameter.
+            transport.metrics = metrics
+        self.transport = transport
+        self.client = getattr(transport, "service", None)
+        self.__token = token
 
     @staticmethod
-    def __get_attribute(attribute: str) -> Optional[str]:
+    def refresh_discovery(token: Optional[str] = None) -> None:
+        """
+        Downloads the latest discovery document of Perspective API and uses it instead of the one bundled with the library for the clients created
+        afterwards in this process. Clients that already exist keep using the document they were created with.
+
+        Parameters
+        -----------
+        token: :class:`Optional[str]`
+            An API key to download the document with. If it's given, it's validated by the API and `InvalidToken` is raised if it's not valid.
+        """
+        import httplib2
+
         try:
-            return difflib.get_close_matches(attribute, all_attrs, n=1)[0]
-        except IndexError:
-            return None
+            response, content = httplib2.Http().request(DISCOVERY_URL + (f"&key={token}" if token else ""))
+        except httplib2.error.ServerNotFoundError as exceptionDetails:
+            raise HTTPException("Unable to connect to the API. Please check your internet connection.").with_traceback(exceptionDetails.__traceback__) from None
+        if response.status != 200:
+            if b"API key not valid" in content:
+                raise _BaseClient._invalid_token() from None
+            raise HTTPException(f"<HttpError {response.status} when requesting {DISCOVERY_URL} returned \"{content.decode('utf-8', errors='replace')}\">") from None
+        _set_discovery_document(json.loads(content))
+
+    def change_token(self, token: str) -> None:
+        self.__token = token
 
     def analyze(self, text: str, attributes: list[str] = Attributes.Production, language: Optional[str] = None, **options) -> dict:
         """
@@ -189,126 +356,332 @@ class Client:
                 Whether to skip the attribute if it's invalid/unknown. Default is `False`.
             return_raw: :class:`bool`
                 Whether to return the raw response or a simplified response with only attributes and their score values. Default is `False`.
+            span_annotations: :class:`bool`
+                Whether to ask for the scores of each sentence of the text too, which are in the `spanScores` of the raw response. Default is `False`.
+            compact: :class:`bool`
+                Whether to return a :class:`perspective.results.AnalysisResult`, a read-only mapping which takes much less memory than a dictionary,
+                instead of a dictionary. Default is `False`.
+            keep_raw: :class:`bool`
+                Whether to keep the raw response in the `AnalysisResult` too, when `compact` is set. Default is `False`.
 
         Returns
         --------
         :class:`dict`: A dictionary containing percents of every attribute requested.
         """
         start_timestamp = time.time()
-        try:
-            if list(attributes) == []:
-                raise MissingAttributes("No valid attributes were provided in attributes argument. Please specify at least one attribute.") from None
-        except TypeError:
-            pass
-        if type(attributes) is str and any(attr in attributes for attr in all_attrs):
-            if str(attributes) in all_attrs:
-                attributes = [str(attributes)]
-            else:
-                raise InvalidFormat("The format of attributes provided is invalid. Please specify attributes by putting them into a list, such as [\"TOXICITY\", \"INSULT\"].") from None
-        elif type(attributes) is str and not any(attr in attributes for attr in all_attrs):
-            raise MissingAttributes("No valid attributes were provided in attributes argument. Please specify at least one attribute.") from None
-        try:
-            for _ in attributes:
-                pass
-        except TypeError as exceptionDetails:
-            if type(attributes) is not list:
-                if type(attributes) is not str:
-                    attributes = repr(attributes)
-                attr_pass = 0
-                for i in range(len(attributes.split("\",\""))):
-                    if attributes.split("\",\"")[i] in all_attrs:
-                        attr_pass += 1
-                if attr_pass == len(attributes.split("\",\"")):
-                    attributes = attributes.split("\",\"")
-                else:
-                    raise UnknownAttribute("Attribute \"{}\" is unknown.".format(f'{attributes=}'.split('=')[1].replace('\'',''))).with_traceback(exceptionDetails.__traceback__) from None
-        attributes = list(attributes)
-        if text.replace(" ", "") == "":
+        attributes, language = self._resolve(attributes, language, **options)
+        return self._analyze(text, attributes, language, start_timestamp, **options)
+
+    def analyze_long(self, text: str, attributes: list[str] = Attributes.Production, language: Optional[str] = None, reducer: Reducer = "max", max_bytes: int = MAX_TEXT_BYTES, max_workers: int = 8, **options) -> dict:
+        """
+        Analyzes a text of any length by splitting it into chunks under the size limit of the API, at sentence boundaries where possible, and
+        analyzing the chunks concurrently. Returns the score of every sentence, as returned by the span annotations of the API, along with a score
+        for the whole text which is aggregated from the scores of the chunks with `reducer`.
+
+        ```py
+        result = client.analyze_long(post, attributes=["TOXICITY"], reducer="weighted")
+        result["scores"]  # {"TOXICITY": 12.48}
+        result["spans"]   # [{"begin": 0, "end": 57, "scores": {"TOXICITY": 3.21}}, ...]
+        ```
+
+        Parameters
+        -----------
+        text: :class:`str`
+            The text to analyze.
+        attributes: :class:`list[str]`
+            A list of attributes to analyze the text for. Default is `perspective.Attributes.Production` (all production-ready attributes).
+        language: :class:`Optional[str]`
+            The language of text. If `None`, language will be automatically detected. Default is `None`.
+        reducer: :class:`Union[Literal["max", "mean", "weighted"], Callable[[list[tuple[float, int]]], float]]`
+            How to aggregate the scores of the chunks into the score of the whole text, see `perspective.chunking.reduce_scores`. Default is "max".
+        max_bytes: :class:`int`
+            The maximum size of a chunk, in bytes of UTF-8. Default is the limit of the API, 20 KB.
+        max_workers: :class:`int`
+            The maximum number of chunks to analyze at the same time. Default is `8`.
+        \*\*options
+            The same options that `analyze` accepts.
+
+        Returns
+        --------
+        :class:`dict`: The aggregated percents of every attribute requested under "scores", and the `begin` and `end` offsets of every sentence in
+        `text` along with its percents under "spans". If `return_raw` is set, a raw response of the API for the whole text instead, whose
+        `summaryScore`s are the aggregated scores and whose `spanScores` have offsets in `text`.
+        """
+        start_timestamp = time.time()
+        # The reducer is only used once every chunk has been analyzed, so it's checked before sending any request.
+        _check_reducer(reducer)
+        attributes, language = self._resolve(attributes, language, **options)
+        chunks = split_text(text, max_bytes)
+        if not chunks:
             raise EmptyText("The text cannot be empty.") from None
+        chunk_options = dict(options, return_raw=True, span_annotations=True)
 
-        for _ in range(2):
-            for attribute in attributes:
-                if f'{attribute=}'.split('=')[1].replace('\'','').upper() in all_attrs:
-                    attributes[attributes.index(attribute)] = f'{attribute=}'.split('=')[1].replace('\'','').upper()
-                else:
-                    if not self.__get_attribute(f'{attribute=}'.split('=')[1].replace('\'','').upper()):
-                        if type(attributes) is list:
-                            operation = 0
-                            for attr in attributes:
-                                if attr in all_attr_grps:
-                                    attributes += repr(all_attr_grps[all_attr_grps.index(attr)]).split("\",\"")
-                                    del attributes[attributes.index(attr)]
-                                    operation += 1
-                                else:
-                                    continue
-                            if operation != 0:
-                                break
-                        if "skip_on_unknown" in options and options["skip_on_unknown"]:
-                            logger.debug("Skipping \"{}\" attribute since it's unknown.".format(f'{attribute=}'.split('=')[1].replace('\'','').upper()))
-                            del attributes[attributes.index(attribute)]
-                            continue
-                        else:
-                            raise UnknownAttribute("Attribute \"{}\" is unknown.".format(f'{attribute=}'.split('=')[1].replace('\'','').upper())) from None
-                    else:
-                        attributes[attributes.index(attribute)] = self.__get_attribute(f'{attribute=}'.split('=')[1].replace('\'','').upper())
-                        if not attributes[attributes.index(attribute)]:
-                            if "skip_on_unknown" in options and options["skip_on_unknown"]:
-                                del attributes[attributes.index(attribute)]
-                                continue
-                            else:
-                                raise UnknownAttribute("Attribute \"{}\" is unknown.".format(f'{attribute=}'.split('=')[1].replace('\'',''))) from None
+        def analyze_chunk(chunk: tuple[int, int]) -> dict:
+            return self._analyze(text[chunk[0]:chunk[1]], attributes, language, start_timestamp, **chunk_options)
 
-        requestedAttributes_dict = {}
-        for attribute in attributes:
-            requestedAttributes_dict[str(attribute)] = {}
-        
-        if not language:
-            analyze_request = {
-                'comment': { 'text': text},
-                'requestedAttributes': requestedAttributes_dict,
-            }
+        if max_workers < 2 or len(chunks) < 2:
+            responses = [analyze_chunk(chunk) for chunk in chunks]
         else:
-            language = self.__get_language_code(language=language)
-            analyze_request = {
-                'comment': { 'text': text},
-                'requestedAttributes': requestedAttributes_dict,
-                'languages': [language]
-            }
-        if "skip_on_lang" in options and options["skip_on_lang"]:
-            for _ in range(len(requestedAttributes_dict)):
-                try:
-                    response = self.client.comments().analyze(body=analyze_request).execute()
-                except errors.HttpError as exceptionDetails:
-                    if "does not support request languages" in str(exceptionDetails):
-                        attribute = str(exceptionDetails).replace(f"<HttpError 400 when requesting https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze?key={self.__token}&alt=json returned \"Attribute ", "").split()[0]
-                        language = str(exceptionDetails)[str(exceptionDetails).find(attribute):].replace(attribute, "").replace(" does not support request languages: ", "").split("\"")[0]
-                        del analyze_request["requestedAttributes"][str(attribute)]
-                        logger.debug(f"Skipping \"{attribute}\" attribute since {self.__get_language_name(language=language)} ({self.__get_language_code(language=language)}) is not supported by the attribute.")
-                        continue
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix="perspective") as executor:
+                responses = list(executor.map(analyze_chunk, chunks))
+
+        attribute_scores = {}
+        for attribute in attributes:
+            scores, spans = [], []
+            for (begin, end), response in zip(chunks, responses):
+                if attribute not in response["attributeScores"]:
+                    continue
+                scores.append((response["attributeScores"][attribute]["summaryScore"]["value"], end - begin))
+                for span in response["attributeScores"][attribute].get("spanScores") or [{"begin": 0, "end": end - begin, "score": response["attributeScores"][attribute]["summaryScore"]}]:
+                    spans.append(dict(span, begin=begin + span.get("begin", 0), end=begin + span.get("end", end - begin)))
+            if scores:
+                attribute_scores[attribute] = {"summaryScore": {"value": reduce_scores(scores, reducer), "type": "PROBABILITY"}, "spanScores": spans}
+
+        if options.get("return_raw"):
+            return {"attributeScores": attribute_scores, "languages": responses[0].get("languages", [])}
+        spans = {}
+        for attribute, scores in attribute_scores.items():
+            for span in scores["spanScores"]:
+                spans.setdefault((span["begin"], span["end"]), {})[attribute] = float(span["score"]["value"]) * 100
+        return {
+            "scores": {attribute: float(scores["summaryScore"]["value"]) * 100 for attribute, scores in attribute_scores.items()},
+            "spans": [{"begin": begin, "end": end, "scores": scores} for (begin, end), scores in sorted(spans.items())],
+        }
+
+    def analyze_many(self, texts: Iterable[str], attributes: list[str] = Attributes.Production, language: Optional[str] = None, max_workers: int = 8, **options) -> list[Union[dict, Exception]]:
+        """
+        Analyzes many texts at once by sending the requests from a pool of threads. The attributes and the language are validated only once for the
+        whole batch, and a failure of a single text does not stop the others from being analyzed.
+
+        Parameters
+        -----------
+        texts: :class:`Iterable[str]`
+            The texts to analyze.
+        attributes: :class:`list[str]`
+            A list of attributes to analyze the texts for. Default is `perspective.Attributes.Production` (all production-ready attributes).
+        language: :class:`Optional[str]`
+            The language of the texts. If `None`, language will be automatically detected for each text. Default is `None`.
+        max_workers: :class:`int`
+            The maximum number of requests to send at the same time. With the "http" transport, at most the `pool_size` of the client. Default is `8`.
+        \*\*options
+            The same options that `analyze` accepts.
+
+        Returns
+        --------
+        :class:`list[Union[dict, Exception]]`: The results in the same order as `texts`. If a text could not be analyzed, the exception that was raised
+        (such as `UnsupportedLanguage` or `HTTPException`) takes its place in the list instead.
+        """
+        return [result for _, result in self.analyze_stream(texts, attributes, language, window=max_workers, ordered=True, **options)]
+
+    def analyze_stream(self, texts: Iterable[str], attributes: list[str] = Attributes.Production, language: Optional[str] = None, window: int = 8, ordered: bool = True, **options) -> Iterator[tuple[str, Union[dict, Exception]]]:
+        """
+        Analyzes the texts of a possibly endless iterable as they come, and yields each text together with its result as soon as it's available. At
+        most `window` requests are in flight at once, and the next text is only taken from `texts` when there's room for it, so memory use doesn't
+        grow with the length of the stream and a slow API slows down the consumption of the source instead of piling texts up. The attributes and
+        the language are validated only once, when `analyze_stream` is called.
+
+        ```py
+        for text, result in client.analyze_stream(consumer, window=16, ordered=False):
+            if not isinstance(result, Exception):
+                ...
+        ```
+
+        Parameters
+        -----------
+        texts: :class:`Iterable[str]`
+            The texts to analyze.
+        attributes: :class:`list[str]`
+            A list of attributes to analyze the texts for. Default is `perspective.Attributes.Production` (all production-ready attributes).
+        language: :class:`Optional[str]`
+            The language of the texts. If `None`, language will be automatically detected for each text. Default is `None`.
+        window: :class:`int`
+            The maximum number of requests to have in flight at once. If `1`, the texts are analyzed one by one in the calling thread. With the "http"
+            transport, at most the `pool_size` of the client. Default is `8`.
+        ordered: :class:`bool`
+            Whether to yield the results in the same order as `texts`, or as soon as each of them is available. Default is `True`.
+        \*\*options
+            The same options that `analyze` accepts.
+
+        Returns
+        --------
+        :class:`Iterator[tuple[str, Union[dict, Exception]]]`: Pairs of a text and its result. If a text could not be analyzed, the exception that was
+        raised (such as `UnsupportedLanguage` or `HTTPException`) takes the place of the result instead.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1.")
+        attributes, language = self._resolve(attributes, language, **options)
+        return self.__stream(iter(texts), attributes, language, window, ordered, **options)
+
+    def __stream(self, texts: Iterator[str], attributes: tuple[str, ...], language: Optional[str], window: int, ordered: bool, **options) -> Iterator[tuple[str, Union[dict, Exception]]]:
+        def analyze_one(text: str) -> Union[dict, Exception]:
+            try:
+                return self._analyze(text, attributes, language, **options)
+            except Exception as exceptionDetails:
+                return exceptionDetails
+
+        if window == 1:
+            for text in texts:
+                yield text, analyze_one(text)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="perspective")
+        in_flight = deque()
+        exhausted = False
+        try:
+            while in_flight or not exhausted:
+                # Texts are only taken from the source while there's room in the window.
+                while not exhausted and len(in_flight) < window:
+                    try:
+                        text = next(texts)
+                    except StopIteration:
+                        exhausted = True
                     else:
-                        raise HTTPException(str(exceptionDetails)).with_traceback(exceptionDetails.__traceback__) from None
-                else:
+                        in_flight.append((text, executor.submit(analyze_one, text)))
+                if not in_flight:
                     break
-        else:
+                if ordered:
+                    text, future = in_flight.popleft()
+                    yield text, future.result()
+                    continue
+                wait([future for _, future in in_flight], return_when=FIRST_COMPLETED)
+                pending = deque()
+                for text, future in in_flight:
+                    if future.done():
+                        yield text, future.result()
+                    else:
+                        pending.append((text, future))
+                in_flight = pending
+        finally:
+            # If the consumer stops early, the requests that haven't been sent yet are cancelled instead of being sent for nothing.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def analyze_batch(self, texts: Iterable[str], attributes: list[str] = Attributes.Production, language: Optional[str] = None, batch_size: int = 100, **options) -> list[Union[dict, Exception]]:
+        """
+        Analyzes many texts by packing up to `batch_size` analyze calls into a single multipart HTTP request to the batch endpoint of the API, which
+        saves a round trip per text. The attributes and the language are validated only once for the whole batch, and a failure of a single text does
+        not stop the others from being analyzed.
+
+        Parameters
+        -----------
+        texts: :class:`Iterable[str]`
+            The texts to analyze.
+        attributes: :class:`list[str]`
+            A list of attributes to analyze the texts for. Default is `perspective.Attributes.Production` (all production-ready attributes).
+        language: :class:`Optional[str]`
+            The language of the texts. If `None`, language will be automatically detected for each text. Default is `None`.
+        batch_size: :class:`int`
+            The maximum number of analyze calls to pack into a single HTTP request, at most 1000. Default is `100`.
+        \*\*options
+            The same options that `analyze` accepts.
+
+        Returns
+        --------
+        :class:`list[Union[dict, Exception]]`: The results in the same order as `texts`. If a text could not be analyzed, the exception that was raised
+        (such as `UnsupportedLanguage` or `HTTPException`) takes its place in the list instead.
+        """
+        if not 1 <= batch_size <= MAX_BATCH_LIMIT:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_LIMIT}.")
+        start_timestamp = time.time()
+        attributes, language = self._resolve(attributes, language, **options)
+        texts = list(texts)
+
+        results = [None] * len(texts)
+        pending = {}
+        keys = {}
+        for index, text in enumerate(texts):
             try:
-                response = self.client.comments().analyze(body=analyze_request).execute()
-            except errors.HttpError as exceptionDetails:
-                if "does not support request languages" in str(exceptionDetails):
-                    attribute = str(exceptionDetails).replace(f"<HttpError 400 when requesting https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze?key={self.__token}&alt=json returned \"Attribute ", "").split()[0]
-                    language = str(exceptionDetails)[str(exceptionDetails).find(attribute):].replace(attribute, "").replace(" does not support request languages: ", "").split("\"")[0]
-                    raise UnsupportedLanguage(f"{self.__get_language_name(language=language)} ({self.__get_language_code(language=language)}) is not supported by \"{attribute}\" attribute.").with_traceback(exceptionDetails.__traceback__) from None
-                else:
-                    raise HTTPException("An unknown error occured. Please try again. Exception details: " + str(exceptionDetails)) from None
-        result = {}
+                analyze_request = self._build_request(text, attributes, language, bool(options.get("span_annotations")))
+                keys[index], response = self._cache_lookup(analyze_request, **options)
+                if response is None:
+                    self._plan_request(analyze_request, **options)
+                    if analyze_request["requestedAttributes"]:
+                        pending[index] = analyze_request
+                        continue
+                    response = {"attributeScores": {}}
+                    if keys[index] is not None:
+                        self.cache.set(keys[index], response)
+                results[index] = self._build_result(analyze_request, response, start_timestamp, **options)
+            except Exception as exceptionDetails:
+                results[index] = exceptionDetails
 
-        for attribute in analyze_request["requestedAttributes"].keys():
-            result[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value'])*100
+        # Texts whose attributes got skipped because of their language are sent again in the next round.
+        while pending:
+            retry = {}
+            requests = list(pending.items())
+            for offset in range(0, len(requests), batch_size):
+                chunk = requests[offset:offset + batch_size]
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(len(chunk))
+                sent = time.perf_counter()
+                responses = self.transport.analyze_batch(chunk, self.__token)
+                if self.metrics is not None:
+                    self.metrics.count("requests", amount=len(chunk))
+                    self.metrics.observe("batch", time.perf_counter() - sent)
+                for index, response in responses.items():
+                    analyze_request = pending[index]
+                    if isinstance(response, HTTPException):
+                        results[index] = response
+                        continue
+                    try:
+                        if isinstance(response, TransportError):
+                            self._handle_error(str(response), analyze_request, response.status, **options)
+                            if analyze_request["requestedAttributes"]:
+                                retry[index] = analyze_request
+                                continue
+                            response = {"attributeScores": {}}
+                        if keys[index] is not None:
+                            self.cache.set(keys[index], response)
+                        results[index] = self._build_result(analyze_request, response, start_timestamp, **options)
+                    except Exception as exceptionDetails:
+                        results[index] = exceptionDetails
+            pending = retry
+        if self.metrics is not None:
+            self.metrics.count_many("errors", (type(result).__name__ for result in results if isinstance(result, Exception)))
+        return results
 
+    def _analyze(self, text: str, attributes: list[str], language: Optional[str], start_timestamp: Optional[float] = None, **options) -> dict:
+        start_timestamp = start_timestamp or time.time()
+        if self.metrics is None:
+            analyze_request = self._build_request(text, attributes, language, bool(options.get("span_annotations")))
+            return self._build_result(analyze_request, self._respond(analyze_request, **options), start_timestamp, **options)
         try:
-            if "return_raw" in options and options["return_raw"]:
-                return response
-            return result
-        except Exception:
-            pass
-        finally:
-            logger.info("Perspective API text analysis has been completed. Request took {:.2f} seconds to process. ".format(time.time() - start_timestamp) + "The attribute with highest score value is {} with a score value of {:.2f}.".format(utils.get_highest(result), result[utils.get_highest(result)]) if result != {} else "However, the response was empty because none of the requested attributes support the language of the text entered.".format(time.time() - start_timestamp))
+            analyze_request = self._build_request(text, attributes, language, bool(options.get("span_annotations")))
+            self.metrics.observe("validation", time.time() - start_timestamp)
+            result = self._build_result(analyze_request, self._respond(analyze_request, **options), start_timestamp, **options)
+        except Exception as exceptionDetails:
+            self.metrics.count("errors", type(exceptionDetails).__name__)
+            raise
+        self.metrics.observe("total", time.time() - start_timestamp)
+        return result
+
+    def _respond(self, analyze_request: dict, **options) -> dict:
+        key, response = self._cache_lookup(analyze_request, **options)
+        if response is None:
+            if self.single_flight is not None:
+                # Only identical requests are coalesced, unlike the responses of the cache which are shared by texts that only differ in whitespace.
+                response = self.single_flight.do(Cache.key(analyze_request, normalize=False, **options), lambda: self._fetch(key, analyze_request, **options))
+            else:
+                response = self._fetch(key, analyze_request, **options)
+        return response
+
+    def _fetch(self, key: Optional[str], analyze_request: dict, **options) -> dict:
+        response = self._execute(analyze_request, **options)
+        if key is not None:
+            self.cache.set(key, response)
+        return response
+
+    def _execute(self, analyze_request: dict, **options) -> dict:
+        """
+        Sends `analyze_request` to the API, dropping attributes that do not support the language of the text if `skip_on_lang` is set, and returns the raw response.
+        """
+        self._plan_request(analyze_request, **options)
+        while analyze_request["requestedAttributes"]:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.metrics is not None:
+                self.metrics.count("requests")
+            try:
+                return self.transport.analyze(analyze_request, self.__token)
+            except TransportError as exceptionDetails:
+                self._handle_error(str(exceptionDetails), analyze_request, exceptionDetails.status, **options)
+        return {"attributeScores": {}}
@@ -0,0 +1,152 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+import threading
+
+# The upper bounds of the buckets of the latency histograms, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Counters with their descriptions, and the name of the label of the counters which are counted separately per value of a label.
+_COUNTERS = {
+    "requests": ("Requests sent to the API, including the ones sent again after skipping attributes.", None),
+    "texts": ("Texts analyzed, by the language of the response.", "language"),
+    "attributes": ("Scores returned, by attribute.", "attribute"),
+    "errors": ("Texts which couldn't be analyzed, by the type of the exception.", "type"),
+    "retries": ("Requests sent again after skipping the attributes which don't support the language of the text.", None),
+    "skipped": ("Attributes skipped because they're unknown or don't support the language of the text, by attribute.", "attribute"),
+    "cache_hits": ("Texts answered from the cache.", None),
+    "cache_misses": ("Texts not found in the cache.", None),
+}
+
+# The phases of a request that latencies are measured for.
+PHASES = {
+    "validation": "Resolving the attributes and the language and building the request.",
+    "serialization": "Encoding the request to JSON.",
+    "network": "Sending the request and receiving the response.",
+    "parse": "Decoding the response from JSON.",
+    "batch": "Sending a batch request and receiving its responses, in analyze_batch.",
+    "total": "Analyzing a text from start to finish.",
+}
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class Metrics:
+    """
+    Counters and latency histograms of the requests of a :class:`perspective.Client`, which are updated as it analyzes texts when they're passed
+    as its `metrics`. A client without metrics doesn't measure anything. The same metrics can be passed to several clients to add them up.
+
+    ```py
+    metrics = Metrics()
+    client = Client(token, transport="http", metrics=metrics)
+    ...
+    metrics.snapshot()       # {"requests": 120, "texts": {"en": 118}, ..., "latency": {"network": {"count": 120, ...}}}
+    metrics.to_prometheus()  # The same in the text format of Prometheus.
+    ```
+
+    Counters:
+
+    - `requests`, `retries`, `cache_hits` and `cache_misses`: a number each.
+    - `texts` by language, `attributes` by attribute, `errors` by the type of the exception and `skipped` attributes by attribute: a dictionary each.
+
+    Latencies are measured for the phases of a request: `validation`, `serialization`, `network`, `parse`, `batch` (a whole batch request of
+    `analyze_batch`) and `total`. The serialization and parsing are measured by the "http" transport only; with the "discovery" transport, they're
+    part of `network`, and custom transports measure the phases they want to with `observe`, see :class:`perspective.transport.Transport`.
+
+    Parameters
+    -----------
+    buckets: :class:`Iterable[float]`
+        The upper bounds of the buckets of the latency histograms, in seconds. Default is from 0.5 milliseconds to 10 seconds.
+    """
+    def __init__(self, buckets: Iterable[float] = BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        if not self.buckets:
+            raise ValueError("buckets cannot be empty.")
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Sets every counter and histogram back to zero.
+        """
+        with self._lock:
+            self._counters = {name: {} for name in _COUNTERS}
+            # A histogram is the number of observations in every bucket, the last one being for observations above the last bound, along with
+            # their sum and count.
+            self._histograms = {}
+
+    def count(self, name: str, label: Optional[str] = None, amount: int = 1) -> None:
+        """
+        Adds `amount` to the counter `name`, or to its value for `label` if it's counted by a label.
+        """
+        with self._lock:
+            counter = self._counters[name]
+            counter[label] = counter.get(label, 0) + amount
+
+    def count_many(self, name: str, labels: Iterable[str]) -> None:
+        """
+        Adds one to the counter `name` for every label of `labels`.
+        """
+        with self._lock:
+            counter = self._counters[name]
+            for label in labels:
+                counter[label] = counter.get(label, 0) + 1
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """
+        Records that `phase` of a request took `seconds`.
+        """
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current values of the counters, and the count, sum, mean and cumulative buckets of the latencies of every phase, in seconds.
+        """
+        with self._lock:
+            counters = {name: dict(counter) for name, counter in self._counters.items()}
+            histograms = {phase: (list(buckets), total, count) for phase, (buckets, total, count) in self._histograms.items()}
+        snapshot = {name: counters[name] if label else counters[name].get(None, 0) for name, (_, label) in _COUNTERS.items()}
+        snapshot["latency"] = {}
+        for phase, (buckets, total, count) in histograms.items():
+            cumulative, running = {}, 0
+            for bound, observations in zip((*self.buckets, float("inf")), buckets):
+                running += observations
+                cumulative[bound] = running
+            snapshot["latency"][phase] = {"count": count, "sum": total, "mean": total / count if count else 0.0, "buckets": cumulative}
+        return snapshot
+
+    def to_prometheus(self, prefix: str = "perspective") -> str:
+        """
+        Returns the metrics in the text exposition format of Prometheus, such as for serving them from a `/metrics` endpoint. Counters are named
+        `<prefix>_<counter>_total` and latencies `<prefix>_latency_seconds`, with the phase in the `phase` label.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, (description, label) in _COUNTERS.items():
+            lines.append(f"# HELP {prefix}_{name}_total {description}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            if label is None:
+                lines.append(f"{prefix}_{name}_total {snapshot[name]}")
+            else:
+                lines.extend(f"{prefix}_{name}_total{{{label}=\"{_escape(value)}\"}} {amount}" for value, amount in sorted(snapshot[name].items(), key=lambda item: str(item[0])))
+        lines.append(f"# HELP {prefix}_latency_seconds The latency of the phases of requests: " + ", ".join(f"{phase}: {description}" for phase, description in PHASES.items()))
+        lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+        for phase, histogram in snapshot["latency"].items():
+            for bound, observations in histogram["buckets"].items():
+                lines.append(f"{prefix}_latency_seconds_bucket{{phase=\"{_escape(phase)}\",le=\"{'+Inf' if bound == float('inf') else repr(bound)}\"}} {observations}")
+            lines.append(f"{prefix}_latency_seconds_sum{{phase=\"{_escape(phase)}\"}} {histogram['sum']!r}")
+            lines.append(f"{prefix}_latency_seconds_count{{phase=\"{_escape(phase)}\"}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,152 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Optional
+
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+class RateLimiter:
+    """
+    A token bucket which limits how many requests are sent per second. The bucket holds at most `burst` tokens and is refilled at `qps` tokens per
+    second; every request takes a token, and waits for one if the bucket is empty. A single limiter can be shared by any number of threads and clients.
+
+    Parameters
+    -----------
+    qps: :class:`float`
+        How many requests may be sent per second on average.
+    burst: :class:`Optional[int]`
+        How many requests may be sent at once after the limiter has been idle for a while. Default is `1`, which spaces the requests evenly.
+    """
+    def __init__(self, qps: float, burst: Optional[int] = None) -> None:
+        if qps <= 0:
+            raise ValueError("qps must be greater than 0.")
+        if burst is not None and burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.qps = float(qps)
+        self.burst = burst or 1
+        self.acquired = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._timestamp = time.monotonic()
+
+    def _refill(self, tokens: float, timestamp: float, now: float, count: int) -> tuple[float, float]:
+        # Tokens may go below zero; a negative balance is a reservation which makes the following callers wait longer.
+        tokens = min(float(self.burst), tokens + max(0.0, now - timestamp) * self.qps) - count
+        return tokens, max(0.0, -tokens / self.qps)
+
+    def _take(self, count: int) -> float:
+        # The monotonic clock isn't affected by changes of the system time, which would stop the refills or grant a burst for free.
+        now = time.monotonic()
+        self._tokens, delay = self._refill(self._tokens, self._timestamp, now, count)
+        self._timestamp = now
+        return delay
+
+    def reserve(self, count: int = 1) -> float:
+        """
+        Takes `count` tokens from the bucket without waiting, and returns how many seconds the caller has to wait before sending its request(s).
+        """
+        with self._lock:
+            delay = self._take(count)
+            self.acquired += count
+            self.waited += delay
+            self.max_wait = max(self.max_wait, delay)
+        return delay
+
+    def acquire(self, count: int = 1) -> float:
+        """
+        Blocks until `count` requests may be sent, and returns how many seconds it has waited.
+        """
+        delay = self.reserve(count)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, count: int = 1) -> float:
+        """
+        Same as `acquire`, but waits without blocking the event loop.
+        """
+        import asyncio
+
+        delay = self.reserve(count)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        """
+        Returns how many requests have gone through the limiter in this process, and how long they have waited in total and at most, in seconds.
+        """
+        with self._lock:
+            return {"acquired": self.acquired, "waited": self.waited, "max_wait": self.max_wait, "average_wait": self.waited / self.acquired if self.acquired else 0.0}
+
+class SharedRateLimiter(RateLimiter):
+    """
+    A :class:`RateLimiter` whose bucket is stored in a file, so that every process which creates a limiter with the same `path` shares the same
+    quota. Worker processes can be started with `fork` or `spawn`; each process opens the file on its own. Statistics are kept per process.
+
+    Parameters
+    -----------
+    path: :class:`str`
+        The file to store the bucket in. It's created if it doesn't exist.
+    qps: :class:`float`
+        How many requests may be sent per second on average, across all processes.
+    burst: :class:`Optional[int]`
+        How many requests may be sent at once after the limiter has been idle for a while. Default is `1`.
+    """
+    __format = struct.Struct("<dd")
+
+    def __init__(self, path: str, qps: float, burst: Optional[int] = None) -> None:
+        super().__init__(qps, burst)
+        self.path = path
+        self.__fd = None
+        self.__pid = None
+
+    def __file(self) -> int:
+        # Locks belong to the open file, so a forked child must not use the descriptor it has inherited from its parent.
+        if self.__pid != os.getpid():
+            self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self.__pid = os.getpid()
+        return self.__fd
+
+    def _take(self, count: int) -> float:
+        fd = self.__file()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, self.__format.size)
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            data = os.read(fd, self.__format.size)
+            # The state is shared with other processes through the file, so it's timed with the wall clock, which they all agree on.
+            now = time.time()
+            tokens, timestamp = self.__format.unpack(data) if len(data) == self.__format.size else (float(self.burst), now)
+            tokens, delay = self._refill(tokens, timestamp, now, count)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, self.__format.pack(tokens, now))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, self.__format.size)
+        return delay
+
+    def close(self) -> None:
+        if self.__fd is not None and self.__pid == os.getpid():
+            os.close(self.__fd)
+        self.__fd = self.__pid = None
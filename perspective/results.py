@@ -0,0 +1,285 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from array import array
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+from .attributes import all_attrs
+
+import json
+
+# Every result refers to this table instead of holding the names of its attributes; a result stores a bit per attribute of the table, and the
+# scores of the attributes it has in the order of the table.
+_ATTRIBUTES = tuple(all_attrs)
+_INDEX = {name: index for index, name in enumerate(_ATTRIBUTES)}
+
+class AnalysisResult(Mapping):
+    """
+    A compact, read-only result of an analysis which behaves like the dictionary `analyze` returns by default: it maps attribute names to score
+    values as percents, so it can be passed to the functions of `perspective.utils`. It takes a fraction of the memory of that dictionary, which
+    matters when millions of results are kept in memory. Attributes are listed in the order of `perspective.all_attrs`.
+
+    Results are returned by `analyze` when the `compact` option is set; the raw response is kept along with the scores only if `keep_raw` is set
+    too, and is only parsed when `raw` is accessed.
+
+    ```py
+    result = client.analyze(text, compact=True)
+    result["TOXICITY"]  # 12.48
+    dict(result)        # {"TOXICITY": 12.48, ...}
+    ```
+    """
+    __slots__ = ("_mask", "_scores", "_raw")
+
+    def __init__(self, scores: Mapping[str, float], raw: Optional[str] = None) -> None:
+        mask = 0
+        for attribute in scores:
+            mask |= 1 << _INDEX[attribute]
+        self._mask = mask
+        self._scores = array("d", (scores[attribute] for attribute in self.__names(mask)))
+        self._raw = raw
+
+    @classmethod
+    def from_response(cls, response: dict, attributes: Optional[Iterable[str]] = None, keep_raw: bool = False) -> "AnalysisResult":
+        """
+        Creates a result from a raw response of the API.
+
+        Parameters
+        -----------
+        response: :class:`dict`
+            The raw response.
+        attributes: :class:`Optional[Iterable[str]]`
+            The attributes to take from the response. If `None`, every attribute in the response is taken. Default is `None`.
+        keep_raw: :class:`bool`
+            Whether to keep the raw response too, so that it's available from `raw`. Default is `False`.
+        """
+        scores = response["attributeScores"]
+        if attributes is None:
+            attributes = scores.keys()
+        return cls(
+            {attribute: float(scores[attribute]["summaryScore"]["value"]) * 100 for attribute in attributes if attribute in scores and attribute in _INDEX},
+            json.dumps(response, separators=(",", ":"), ensure_ascii=False) if keep_raw else None,
+        )
+
+    @staticmethod
+    def __names(mask: int) -> Iterator[str]:
+        index = 0
+        while mask:
+            if mask & 1:
+                yield _ATTRIBUTES[index]
+            mask >>= 1
+            index += 1
+
+    def __position(self, attribute: str) -> int:
+        # The position of a score in the array is the number of attributes before it in the table that the result has.
+        bit = 1 << _INDEX[attribute]
+        if not self._mask & bit:
+            raise KeyError(attribute)
+        return bin(self._mask & (bit - 1)).count("1")
+
+    def __getitem__(self, attribute: str) -> float:
+        try:
+            return self._scores[self.__position(attribute)]
+        except (KeyError, TypeError):
+            raise KeyError(attribute) from None
+
+    def __contains__(self, attribute: object) -> bool:
+        return attribute in _INDEX and bool(self._mask & (1 << _INDEX[attribute]))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.__names(self._mask)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __repr__(self) -> str:
+        return f"AnalysisResult({dict(self)!r})"
+
+    def __reduce__(self) -> tuple:
+        return (AnalysisResult, (dict(self), self._raw))
+
+    @property
+    def raw(self) -> Optional[dict]:
+        """
+        The raw response of the API, or `None` if it hasn't been kept. It's parsed every time it's accessed.
+        """
+        return json.loads(self._raw) if self._raw is not None else None
+
+    def to_dict(self) -> dict[str, float]:
+        """
+        Returns the scores as a plain dictionary, the same as `analyze` returns without the `compact` option.
+        """
+        return dict(zip(self.__names(self._mask), self._scores))
+
+def _numpy():
+    # numpy isn't a dependency of the library, it's only needed, and imported, when a ResultBatch is used.
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("ResultBatch requires numpy, which can be installed with \"pip install numpy\".") from None
+    return numpy
+
+class ResultBatch:
+    """
+    The results of many texts stored as columns: a `(texts × attributes)` array of score values as percents, along with the names of the
+    attributes of the columns and a label for every row, so that results can be thresholded, ranked and aggregated without a loop over them.
+    Scores which are missing, such as those of attributes skipped because of the language of a text or of texts which couldn't be analyzed,
+    are `nan`. Requires numpy.
+
+    ```py
+    batch = ResultBatch.from_results(client.analyze_many(texts), index=ids)
+    toxic = batch.filter(batch.above(80, "TOXICITY"))
+    print(toxic.index, batch.percentile(95))
+    ```
+
+    Parameters
+    -----------
+    scores: :class:`numpy.ndarray`
+        The scores, a row per text and a column per attribute.
+    attributes: :class:`Sequence[str]`
+        The names of the attributes of the columns.
+    index: :class:`Optional[Sequence]`
+        A label for every row, such as the id of the text. Default is `None`, which numbers the rows from 0.
+    """
+    __slots__ = ("scores", "attributes", "index", "_columns")
+
+    def __init__(self, scores: "numpy.ndarray", attributes: Sequence[str], index: Optional[Sequence] = None) -> None:
+        np = _numpy()
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.ndim != 2 or scores.shape[1] != len(attributes):
+            raise ValueError("scores must have a row per text and a column per attribute.")
+        self.scores = scores
+        self.attributes = tuple(attributes)
+        self.index = np.arange(len(scores)) if index is None else np.asarray(index)
+        if len(self.index) != len(scores):
+            raise ValueError("index must have a label for every row.")
+        self._columns = {attribute: column for column, attribute in enumerate(self.attributes)}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Union[Mapping, Exception, None]], attributes: Optional[Sequence[str]] = None, index: Optional[Sequence] = None) -> "ResultBatch":
+        """
+        Creates a batch from results in any of the shapes the library returns them in: dictionaries of percents, `AnalysisResult`s or raw
+        responses. Exceptions, which take the place of results that failed in `analyze_many`, `analyze_batch` and `analyze_stream`, and `None`
+        become rows of `nan`.
+
+        Parameters
+        -----------
+        results: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The results.
+        attributes: :class:`Optional[Sequence[str]]`
+            The attributes to make columns for. If `None`, a column is made for every attribute found in the results, in the order of
+            `perspective.all_attrs`. Default is `None`.
+        index: :class:`Optional[Sequence]`
+            A label for every result. Default is `None`, which numbers them from 0.
+        """
+        np = _numpy()
+        rows = []
+        for result in results:
+            if isinstance(result, Mapping) and "attributeScores" in result:
+                result = AnalysisResult.from_response(result)
+            rows.append(result if isinstance(result, Mapping) else {})
+        if attributes is None:
+            found = set().union(*rows) if rows else set()
+            attributes = [attribute for attribute in _ATTRIBUTES if attribute in found]
+        scores = np.full((len(rows), len(attributes)), np.nan)
+        for row, result in enumerate(rows):
+            for column, attribute in enumerate(attributes):
+                if attribute in result:
+                    scores[row, column] = result[attribute]
+        return cls(scores, attributes, index)
+
+    def to_dicts(self) -> list[dict[str, float]]:
+        """
+        Returns the results as dictionaries of percents, the same as `analyze` returns them, leaving out missing scores.
+        """
+        np = _numpy()
+        present = ~np.isnan(self.scores)
+        return [{attribute: float(value) for attribute, value, keep in zip(self.attributes, row, mask) if keep} for row, mask in zip(self.scores, present)]
+
+    def to_results(self) -> list[AnalysisResult]:
+        """
+        Returns the results as `AnalysisResult`s, leaving out missing scores.
+        """
+        return [AnalysisResult(result) for result in self.to_dicts()]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __repr__(self) -> str:
+        return f"ResultBatch({len(self)} texts × {len(self.attributes)} attributes: {', '.join(self.attributes)})"
+
+    def column(self, attribute: str) -> "numpy.ndarray":
+        """
+        Returns the scores of `attribute` for every text.
+        """
+        try:
+            return self.scores[:, self._columns[attribute]]
+        except KeyError:
+            raise KeyError(f"The batch has no \"{attribute}\" column.") from None
+
+    def __values(self, attribute: Optional[str]) -> "numpy.ndarray":
+        return self.scores if attribute is None else self.column(attribute)[:, None]
+
+    def argmax(self) -> list[Optional[str]]:
+        """
+        Returns the attribute with the highest score of every text, or `None` for texts without any score; the same as `utils.get_highest` for
+        every result.
+        """
+        np = _numpy()
+        present = ~np.isnan(self.scores).all(axis=1)
+        columns = np.argmax(np.where(np.isnan(self.scores), -np.inf, self.scores), axis=1)
+        return [self.attributes[column] if keep else None for column, keep in zip(columns.tolist(), present.tolist())]
+
+    def above(self, threshold: float, attribute: Optional[str] = None) -> "numpy.ndarray":
+        """
+        Returns a boolean mask of the texts whose score of `attribute`, or of any attribute if `attribute` is `None`, is at least `threshold`.
+        Missing scores are never above the threshold.
+        """
+        np = _numpy()
+        with np.errstate(invalid="ignore"):
+            return (self.__values(attribute) >= threshold).any(axis=1)
+
+    def filter(self, mask: Sequence) -> "ResultBatch":
+        """
+        Returns a batch of the texts selected by `mask`, which is either a boolean mask, such as the one `above` returns, or the positions of the rows.
+        """
+        np = _numpy()
+        mask = np.asarray(mask)
+        return ResultBatch(self.scores[mask], self.attributes, self.index[mask])
+
+    def top(self, k: int, attribute: Optional[str] = None) -> "ResultBatch":
+        """
+        Returns a batch of the `k` texts with the highest score of `attribute`, or with the highest score of any attribute if `attribute` is
+        `None`, from the highest to the lowest. Texts without a score come last.
+        """
+        np = _numpy()
+        values = self.__values(attribute)
+        values = np.where(np.isnan(values), -np.inf, values).max(axis=1)
+        k = max(0, min(k, len(values)))
+        if k == 0:
+            return self.filter(np.zeros(0, dtype=np.intp))
+        positions = np.argpartition(-values, k - 1)[:k]
+        return self.filter(positions[np.argsort(-values[positions], kind="stable")])
+
+    def percentile(self, q: Union[float, Sequence[float]], attribute: Optional[str] = None) -> Union[dict[str, "numpy.ndarray"], "numpy.ndarray"]:
+        """
+        Returns the `q`th percentile(s) of the scores of `attribute`, or a dictionary of them for every attribute if `attribute` is `None`. Missing
+        scores are ignored.
+        """
+        np = _numpy()
+        if attribute is not None:
+            return np.nanpercentile(self.column(attribute), q)
+        return {attribute: np.nanpercentile(self.scores[:, column], q) for column, attribute in enumerate(self.attributes)}
+
+    def mean(self) -> dict[str, float]:
+        """
+        Returns the mean score of every attribute, ignoring missing scores.
+        """
+        np = _numpy()
+        with np.errstate(invalid="ignore"):
+            counts = (~np.isnan(self.scores)).sum(axis=0)
+            sums = np.nansum(self.scores, axis=0)
+            return {attribute: float(total / count) if count else float("nan") for attribute, total, count in zip(self.attributes, sums, counts)}
@@ -0,0 +1,280 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Hashable, Iterable, Literal, Mapping, Optional, Union
+
+from .attributes import Attributes, AttributeSet
+from .export import JSONLinesWriter, _error
+from .storage import ScoreStore
+from .utils import Utils
+
+import csv
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Asks the writer thread to write what it has buffered and to stop.
+_CLOSE = object()
+
+Record = tuple[Optional[Hashable], Optional[str], Union[Mapping, Exception, None]]
+
+class Sink:
+    """
+    Writes the results of analyses from a background thread, so that writing them doesn't slow down analyzing texts. Results are put in a bounded
+    queue and written in batches, once `batch_size` results are buffered or `flush_interval` seconds after the first one of a batch, whichever
+    comes first. When the queue is full, `put` blocks until the writer catches up, so results never pile up in memory faster than they can be
+    written. A sink must be closed, or used as a context manager, so that buffered results are written before the program exits.
+
+    ```py
+    with JSONLinesSink("results.jsonl") as sink:
+        for text, result in client.analyze_stream(texts, window=16):
+            sink.put(result, text=text)
+    ```
+
+    If writing a batch fails, the error is raised from the next call to `put`, `flush` or `close`, and the results of that batch are lost.
+
+    Parameters
+    -----------
+    batch_size: :class:`int`
+        How many results to write at once. Default is `500`.
+    flush_interval: :class:`float`
+        The maximum number of seconds a result is buffered before it's written. Default is `1.0`.
+    max_queue: :class:`int`
+        The maximum number of results waiting to be written. Default is `10000`.
+    """
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0, max_queue: int = 10000) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive.")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1.")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.__queue = queue.Queue(max_queue)
+        self.__error = None
+        self.__closed = False
+        self.__lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name=f"perspective-{type(self).__name__}", daemon=True)
+        self.__thread.start()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __raise(self) -> None:
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def put(self, result: Union[Mapping, Exception, None], id: Optional[Hashable] = None, text: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        """
+        Queues a result to be written.
+
+        Parameters
+        -----------
+        result: :class:`Union[Mapping, Exception, None]`
+            What `analyze` returned, raw or not, or the exception that took the place of the result of a text in `analyze_many`, `analyze_batch`
+            or `analyze_stream`.
+        id: :class:`Optional[Hashable]`
+            The id of the text. Default is `None`.
+        text: :class:`Optional[str]`
+            The text itself, which sinks store the hash of. Default is `None`.
+        timeout: :class:`Optional[float]`
+            The maximum number of seconds to wait for room in the queue, after which `queue.Full` is raised. Default is `None`, which waits as long
+            as it takes.
+        """
+        if self.__closed:
+            raise ValueError("The sink is closed.")
+        self.__raise()
+        self.__queue.put((id, text, result), timeout=timeout)
+
+    def put_many(self, results: Iterable[Union[Mapping, Exception, None]], ids: Optional[Iterable[Hashable]] = None, texts: Optional[Iterable[str]] = None) -> None:
+        """
+        Queues many results to be written, such as the list that `analyze_many` or `analyze_batch` returned, along with the id and the text of each.
+        """
+        results = list(results)
+        ids = [None] * len(results) if ids is None else list(ids)
+        texts = [None] * len(results) if texts is None else list(texts)
+        if not len(ids) == len(texts) == len(results):
+            raise ValueError("ids and texts must have an item for every result.")
+        for result, id, text in zip(results, ids, texts):
+            self.put(result, id, text)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until every result queued so far has been written.
+        """
+        if self.__closed:
+            raise ValueError("The sink is closed.")
+        done = threading.Event()
+        self.__queue.put(done, timeout=timeout)
+        done.wait(timeout)
+        self.__raise()
+
+    def close(self) -> None:
+        """
+        Writes the remaining results, stops the writer thread and closes the underlying file. Closing a sink more than once has no effect.
+        """
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+        self.__queue.put(_CLOSE)
+        self.__thread.join()
+        try:
+            self._close()
+        finally:
+            self.__raise()
+
+    def stats(self) -> dict:
+        """
+        Returns how many results have been written (`written`), lost because writing them failed (`dropped`) and are waiting in the queue (`pending`).
+        """
+        return {"written": self.written, "dropped": self.dropped, "pending": self.__queue.qsize()}
+
+    def __write(self, records: list[Record]) -> None:
+        if not records:
+            return
+        try:
+            self._write(records)
+            self.written += len(records)
+        except Exception as exceptionDetails:
+            logger.error(f"{type(self).__name__} failed to write {len(records)} results: {exceptionDetails}")
+            self.dropped += len(records)
+            if self.__error is None:
+                self.__error = exceptionDetails
+        records.clear()
+
+    def __run(self) -> None:
+        buffer = []
+        deadline = None
+        while True:
+            try:
+                item = self.__queue.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is None:
+                self.__write(buffer)
+            elif item is _CLOSE:
+                self.__write(buffer)
+                return
+            elif isinstance(item, threading.Event):
+                self.__write(buffer)
+                item.set()
+            else:
+                buffer.append(item)
+                if len(buffer) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(buffer) >= self.batch_size:
+                    self.__write(buffer)
+            if not buffer:
+                deadline = None
+
+    def _write(self, records: list[Record]) -> None:
+        """
+        Writes a batch of `(id, text, result)` records. Called from the writer thread only.
+        """
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        """
+        Closes the underlying file once every record has been written.
+        """
+
+class SQLiteSink(Sink):
+    """
+    A sink which appends scores to a `perspective.storage.ScoreStore`, a batch per transaction. Failed results are left out.
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the database.
+    synchronous: :class:`Literal["OFF", "NORMAL", "FULL", "EXTRA"]`
+        The `synchronous` setting of SQLite. Default is "NORMAL".
+    \*\*options
+        The options of :class:`Sink`.
+    """
+    def __init__(self, filename: str, synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL", **options) -> None:
+        self.store = ScoreStore(filename, synchronous)
+        super().__init__(**options)
+
+    def _write(self, records: list[Record]) -> None:
+        ids, texts, results = zip(*records)
+        self.store.add_many(results, ids, texts)
+
+    def _close(self) -> None:
+        self.store.close()
+
+class JSONLinesSink(Sink):
+    """
+    A sink which appends a JSON line per result to a file through a `perspective.export.JSONLinesWriter`, with the id of the text under "id", the
+    hash of the text under "text_hash", the scores as percents under "scores" and the error message of failed results under "error".
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the file. It's created if it doesn't exist, and appended to if it does.
+    compress: :class:`Optional[bool]`
+        Whether to compress the file with gzip. If `None`, it's compressed if `filename` ends with ".gz". Default is `None`.
+    max_bytes: :class:`Optional[int]`
+        The size at which the writer moves on to the next file. If `None`, a single file is written. Default is `None`.
+    include_raw: :class:`bool`
+        Whether to write the raw response too, for results which have it. Default is `False`.
+    \*\*options
+        The options of :class:`Sink`.
+    """
+    def __init__(self, filename: str, compress: Optional[bool] = None, max_bytes: Optional[int] = None, include_raw: bool = False, **options) -> None:
+        self.writer = JSONLinesWriter(filename, compress=compress, max_bytes=max_bytes, include_raw=include_raw)
+        super().__init__(**options)
+
+    def _write(self, records: list[Record]) -> None:
+        ids, texts, results = zip(*records)
+        self.writer.write_many(results, ids, texts)
+        self.writer.flush()
+
+    def _close(self) -> None:
+        self.writer.close()
+
+class CSVSink(Sink):
+    """
+    A sink which appends a CSV row per result to a file, with the id of the text in the "id" column, a column per attribute and the error message
+    of failed results in the "error" column. The header is written if the file is empty.
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the file. It's created if it doesn't exist, and appended to if it does.
+    attributes: :class:`list[str]`
+        The attributes to make columns for, the same as `analyze` accepts. Default is `perspective.Attributes.Production`.
+    \*\*options
+        The options of :class:`Sink`.
+    """
+    def __init__(self, filename: str, attributes: list[str] = Attributes.Production, **options) -> None:
+        self.attributes = AttributeSet(attributes).names
+        self.file = open(filename, mode="a", encoding="utf-8", newline="")
+        self.__writer = csv.DictWriter(self.file, fieldnames=["id", *self.attributes, "error"], extrasaction="ignore")
+        if self.file.tell() == 0:
+            self.__writer.writeheader()
+        super().__init__(**options)
+
+    def _write(self, records: list[Record]) -> None:
+        ids, _, results = zip(*records)
+        self.__writer.writerows(
+            {"id": id, **(scores or {}), "error": _error(result) if scores is None else ""}
+            for id, result, scores in zip(ids, results, Utils.normalize_many(results))
+        )
+        self.file.flush()
+
+    def _close(self) -> None:
+        self.file.close()
@@ -0,0 +1,179 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Iterable, Iterator, Literal, Mapping, Optional, Union
+
+from .utils import Utils
+
+import hashlib
+import pathlib
+import threading
+import time
+
+def text_hash(text: str) -> str:
+    """
+    Returns the hash which identifies `text` in a :class:`ScoreStore`, the SHA-256 of its UTF-8 bytes in hexadecimal.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ScoreStore:
+    """
+    An append-only SQLite3 store for the scores of many texts. Every score is a row of the `scores` table, which has the following columns and
+    is indexed for looking scores up by attribute and score, by comment id and by text:
+
+    - `comment_id` (`TEXT`): the id of the comment, if given.
+    - `text_hash` (`TEXT`): the SHA-256 of the text, if given; texts themselves aren't stored.
+    - `created` (`REAL`): when the score was stored, as a Unix timestamp.
+    - `attribute` (`TEXT`): the name of the attribute.
+    - `score` (`REAL`): the score value as a percent.
+
+    Responses are stored in bulk, many of them in a single transaction, and the database is in WAL mode, so that it can be read while it's
+    being written to. A store can be shared by several threads.
+
+    ```py
+    with ScoreStore("scores.sqlite3") as store:
+        store.add_many(client.analyze_many(texts), comment_ids=ids, texts=texts)
+        for comment_id, score in store.query("TOXICITY", min_score=90, columns=("comment_id", "score")):
+            ...
+    ```
+
+    Parameters
+    -----------
+    filename: :class:`str`
+        The path of the database. It's created if it doesn't exist, and appended to if it does.
+    synchronous: :class:`Literal["OFF", "NORMAL", "FULL", "EXTRA"]`
+        The `synchronous` setting of SQLite, how hard it tries to make sure a transaction is on the disk before moving on. "NORMAL" doesn't lose
+        data if the process crashes, but may lose the last transactions if the whole system does. Default is "NORMAL".
+    """
+    COLUMNS = ("comment_id", "text_hash", "created", "attribute", "score")
+
+    def __init__(self, filename: str, synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL") -> None:
+        if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError("synchronous can be either \"OFF\", \"NORMAL\", \"FULL\" or \"EXTRA\".")
+        import sqlite3 as sql
+
+        self.filename = filename
+        self.__lock = threading.Lock()
+        self.__connection = sql.connect(filename, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(f"PRAGMA synchronous={synchronous}")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "comment_id TEXT, text_hash TEXT, created REAL NOT NULL, attribute TEXT NOT NULL, score REAL NOT NULL)"
+        )
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS scores_attribute_score ON scores (attribute, score)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS scores_comment_id ON scores (comment_id)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS scores_text_hash ON scores (text_hash)")
+
+    def __enter__(self) -> "ScoreStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def add(self, response: Mapping, comment_id: Optional[str] = None, text: Optional[str] = None, created: Optional[float] = None) -> int:
+        """
+        Stores the scores of a single response. See `add_many`.
+        """
+        return self.add_many([response], None if comment_id is None else [comment_id], None if text is None else [text], created)
+
+    def add_many(self, responses: Iterable[Union[Mapping, Exception, None]], comment_ids: Optional[Iterable[str]] = None, texts: Optional[Iterable[str]] = None, created: Optional[float] = None) -> int:
+        """
+        Stores the scores of many responses in a single transaction. Exceptions and empty responses, which take the place of texts that couldn't be
+        analyzed in the results of `analyze_many` and `analyze_batch`, are left out.
+
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, raw or not, or the list that `analyze_many` or `analyze_batch` returned.
+        comment_ids: :class:`Optional[Iterable[str]]`
+            The id of the comment of every response, in the same order. Default is `None`.
+        texts: :class:`Optional[Iterable[str]]`
+            The text of every response, in the same order, to store the hashes of. Default is `None`.
+        created: :class:`Optional[float]`
+            The timestamp to store the scores with. Default is `None`, which is the current time.
+
+        Returns
+        --------
+        :class:`int`: How many scores have been stored.
+        """
+        created = time.time() if created is None else created
+        responses = Utils.normalize_many(responses)
+        comment_ids = [None] * len(responses) if comment_ids is None else [None if id is None else str(id) for id in comment_ids]
+        hashes = [None] * len(responses) if texts is None else [None if text is None else text_hash(text) for text in texts]
+        if not len(comment_ids) == len(hashes) == len(responses):
+            raise ValueError("comment_ids and texts must have an item for every response.")
+        rows = [
+            (comment_id, hash, created, attribute, float(score))
+            for response, comment_id, hash in zip(responses, comment_ids, hashes) if response is not None
+            for attribute, score in response.items()
+        ]
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                self.__connection.executemany("INSERT INTO scores VALUES (?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                self.__connection.execute("ROLLBACK")
+                raise
+            self.__connection.execute("COMMIT")
+        return len(rows)
+
+    def query(self, attribute: Optional[str] = None, min_score: Optional[float] = None, max_score: Optional[float] = None, comment_id: Optional[str] = None, text: Optional[str] = None, columns: Iterable[str] = COLUMNS, limit: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Yields the stored scores which match all of the given conditions, as tuples of `columns`, in no particular order. Every query reads through a
+        connection of its own, so scores can be stored while it's being iterated; they may or may not be yielded by it.
+
+        Parameters
+        -----------
+        attribute: :class:`Optional[str]`
+            Only the scores of this attribute. Default is `None`.
+        min_score: :class:`Optional[float]`
+            Only the scores at least this high, as a percent. Default is `None`.
+        max_score: :class:`Optional[float]`
+            Only the scores at most this high, as a percent. Default is `None`.
+        comment_id: :class:`Optional[str]`
+            Only the scores of this comment. Default is `None`.
+        text: :class:`Optional[str]`
+            Only the scores of this text. Default is `None`.
+        columns: :class:`Iterable[str]`
+            The columns to return, out of `ScoreStore.COLUMNS`. Default is all of them.
+        limit: :class:`Optional[int]`
+            The maximum number of scores to return. Default is `None`, which returns all of them.
+        """
+        columns = list(columns)
+        if not columns or any(column not in self.COLUMNS for column in columns):
+            raise ValueError(f"columns can only contain {', '.join(self.COLUMNS)}.")
+        conditions, parameters = [], []
+        for condition, value in (("attribute = ?", attribute), ("score >= ?", min_score), ("score <= ?", max_score), ("comment_id = ?", None if comment_id is None else str(comment_id)), ("text_hash = ?", None if text is None else text_hash(text))):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        statement = f"SELECT {', '.join(columns)} FROM scores" + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+        if limit is not None:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+        # Rows are fetched a page at a time rather than all at once, so that querying millions of scores doesn't hold them all in memory. The
+        # database is in WAL mode, so a read-only connection of the query reads alongside the connection which stores scores without locking it.
+        import sqlite3 as sql
+
+        connection = sql.connect(f"{pathlib.Path(self.filename).absolute().as_uri()}?mode=ro", uri=True)
+        try:
+            cursor = connection.execute(statement, parameters)
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
@@ -0,0 +1,192 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit, parse_qs
+
+from .attributes import Attributes, all_attrs
+
+from email.parser import Parser
+import hashlib
+import json
+import re
+import threading
+import time
+
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)\s*")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path.endswith("/comments:analyze"):
+            status, payload = self.server.stand_in.analyze(self._read_body(), parse_qs(url.query).get("key", [None])[0])
+            self._send_json(status, payload)
+        elif url.path.endswith("/batch"):
+            content_type, data = self.server.stand_in.batch(self._read_body(), self.headers.get("Content-Type", ""))
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {url.path}", "status": "NOT_FOUND"}})
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait for a SYN retransmission when they all connect at once.
+    request_queue_size = 128
+    stand_in: "StandInServer"
+
+class StandInServer:
+    """
+    A local stand-in for Perspective API which can be used to test code that uses this library without network access or an API key, and to
+    benchmark the client side of the library. Scores are derived from a hash of the text, so the same text always gets the same scores.
+
+    Languages are validated against the `supportedLanguages` declared in :class:`perspective.Attributes`, and rejected the same way the real API
+    rejects them. Texts without an explicit language are treated as English.
+
+    ```py
+    with StandInServer() as server:
+        client = AsyncClient(token="any", base_url=server.url)
+    ```
+
+    Parameters
+    -----------
+    latency: :class:`float`
+        How many seconds to wait before answering each request, to simulate network latency. Default is `0.0`.
+    token: :class:`Optional[str]`
+        The only API key to accept. If `None`, any key is accepted. Default is `None`.
+    host: :class:`str`
+        The interface to listen on. Default is "127.0.0.1".
+    port: :class:`int`
+        The port to listen on. Default is `0`, which picks a free port.
+    """
+    def __init__(self, latency: float = 0.0, token: Optional[str] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.latency = latency
+        self.token = token
+        self.requests = 0
+        self.__lock = threading.Lock()
+        self.__server = _Server((host, port), _Handler)
+        self.__server.stand_in = self
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "StandInServer":
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="perspective-stand-in", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @staticmethod
+    def score(text: str, attribute: str) -> float:
+        """
+        Returns the deterministic score value (between 0 and 1) that the server gives to `text` for `attribute`.
+        """
+        return int.from_bytes(hashlib.blake2b(f"{attribute}:{text}".encode("utf-8"), digest_size=4).digest(), "big") / 0xFFFFFFFF
+
+    @staticmethod
+    def _error(status: int, message: str) -> tuple[int, dict]:
+        return status, {"error": {"code": status, "message": message, "status": "INVALID_ARGUMENT" if status == 400 else "UNKNOWN"}}
+
+    def analyze(self, body: bytes, key: Optional[str]) -> tuple[int, dict]:
+        """
+        Handles the body of a `comments:analyze` request and returns the status code and the response.
+        """
+        with self.__lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.token is not None and key != self.token:
+            return self._error(400, "API key not valid. Please pass a valid API key.")
+        try:
+            request = json.loads(body)
+            text = request["comment"]["text"]
+            attributes = list(request["requestedAttributes"])
+        except (ValueError, KeyError, TypeError):
+            return self._error(400, "Invalid JSON payload received.")
+        if not attributes:
+            return self._error(400, "Must specify at least one requestedAttributes.")
+        languages = request.get("languages") or ["en"]
+
+        scores = {}
+        for attribute in attributes:
+            if attribute not in all_attrs:
+                return self._error(400, f"Unknown attribute: {attribute}")
+            supported = getattr(getattr(Attributes, attribute), "supportedLanguages", ["en"])
+            if languages[0] not in supported:
+                return self._error(400, f"Attribute {attribute} does not support request languages: {languages[0]}")
+            value = self.score(text, attribute)
+            # With span annotations, every sentence is scored on its own; otherwise there's a single span for the whole text.
+            sentences = [match.span() for match in _SENTENCE.finditer(text)] if request.get("spanAnnotations") else [(0, len(text))]
+            scores[attribute] = {
+                "spanScores": [{"begin": begin, "end": end, "score": {"value": self.score(text[begin:end], attribute) if len(sentences) > 1 else value, "type": "PROBABILITY"}} for begin, end in sentences],
+                "summaryScore": {"value": value, "type": "PROBABILITY"},
+            }
+        return 200, {"attributeScores": scores, "languages": languages, "detectedLanguages": languages}
+
+    def batch(self, body: bytes, content_type: str) -> tuple[str, bytes]:
+        """
+        Handles a multipart/mixed batch request, the format which `googleapiclient.http.BatchHttpRequest` sends, by answering every
+        `comments:analyze` call inside it. Returns the content type and the body of the multipart/mixed response.
+        """
+        message = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n" + body.decode("utf-8"))
+        boundary = f"batch_{hashlib.blake2b(body, digest_size=8).hexdigest()}"
+        parts = []
+        for part in message.get_payload():
+            request_line, _, request = part.get_payload().partition("\n")
+            inner = Parser().parsestr(request)
+            url = urlsplit(request_line.split()[1])
+            if url.path.endswith("/comments:analyze"):
+                status, payload = self.analyze(inner.get_payload().encode("utf-8"), parse_qs(url.query).get("key", [None])[0])
+            else:
+                status, payload = 404, {"error": {"code": 404, "message": f"Unknown path {url.path}", "status": "NOT_FOUND"}}
+            data = json.dumps(payload)
+            content_id = part["Content-ID"] or ""
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(data.encode('utf-8'))}\r\n\r\n"
+                f"{data}\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(parts).encode("utf-8")
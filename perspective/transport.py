@@ -0,0 +1,319 @@
+__title__ = "perspective.py"
+__author__ = "Yilmaz4"
+__license__ = "MIT"
+__copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
+__version__ = "1.0.0"
+
+from typing import Optional, Union
+from urllib.parse import urlsplit, quote
+
+from .errors import *
+
+import json
+import os
+import queue
+import threading
+import time
+
+API_URL = "https://commentanalyzer.googleapis.com/"
+DISCOVERY_URL = f"{API_URL}$discovery/rest?version=v1alpha1"
+# The maximum number of calls in a single batch request, same as `googleapiclient.http.MAX_BATCH_LIMIT`.
+MAX_BATCH_LIMIT = 1000
+
+_discovery_document = None
+_services = {}
+_services_lock = threading.Lock()
+
+def _get_service(base_url: str = API_URL) -> "googleapiclient.discovery.Resource":
+    """
+    Returns the service object built from the discovery document bundled with the library, which is read and built only once per process. The
+    service object is built without an API key, the key is passed along with every request instead. `googleapiclient` is imported here, when the
+    first :class:`DiscoveryTransport` is created, rather than when the library is imported.
+    """
+    global _discovery_document
+    from googleapiclient import discovery
+    import httplib2
+
+    with _services_lock:
+        try:
+            return _services[base_url]
+        except KeyError:
+            pass
+        if _discovery_document is None:
+            with open(os.path.join(os.path.dirname(__file__), "commentanalyzer.v1alpha1.json"), mode="r", encoding="utf-8") as file:
+                _discovery_document = json.load(file)
+        document = _discovery_document if base_url == API_URL else dict(_discovery_document, rootUrl=base_url, baseUrl=base_url)
+        _services[base_url] = discovery.build_from_document(document, http=httplib2.Http())
+        return _services[base_url]
+
+def _set_discovery_document(document: dict) -> None:
+    global _discovery_document
+    with _services_lock:
+        _discovery_document = document
+        _services.clear()
+
+# Errors which mean that a connection which had been idle was closed by the server in the meantime. `http.client.RemoteDisconnected`, raised
+# when the server closes the connection without sending a response, is a `ConnectionResetError`.
+_STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError)
+
+def _retryable(exception: BaseException, reused: bool, attempt: int, responded: bool) -> bool:
+    """
+    Whether a request which failed with `exception` can be sent again: only once, only if it was sent over a connection that had been idle, and
+    only if the connection turned out to have been closed before any of the response arrived. Timeouts are never retried, since the API may have
+    received the request and be processing it; sending it again would be paid for twice.
+    """
+    return reused and attempt == 0 and not responded and isinstance(exception, _STALE_CONNECTION_ERRORS)
+
+def _connection_error(exception: BaseException) -> HTTPException:
+    """
+    Returns the `HTTPException` to raise for a request which couldn't be completed because of `exception`.
+    """
+    import socket
+
+    if isinstance(exception, (TimeoutError, socket.timeout)):
+        return HTTPException("The request to the API has timed out.")
+    return HTTPException("Unable to connect to the API. Please check your internet connection.")
+
+def _http_error(status: int, data: Union[bytes, str]) -> "TransportError":
+    """
+    Returns the `TransportError` for an error response of the API, with the error message of its JSON body if it has one.
+    """
+    try:
+        message = json.loads(data)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = data.decode("utf-8", errors="replace") if isinstance(data, bytes) else data
+    return TransportError(f"<HttpError {status} returned \"{message}\">", status)
+
+class TransportError(Exception):
+    """
+    Raised by a transport when the API responds to a request with an error. The message contains the error message returned by the API.
+    """
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+class Transport:
+    """
+    The base class of transports, which are what :class:`perspective.Client` sends its requests through. A transport must be safe to use from
+    several threads at once. A client with :class:`perspective.metrics.Metrics` sets them as the `metrics` of its transport, replacing any metrics it
+    had, and the transport measures the latency of the phases of its requests with `metrics.observe` if it's not `None`.
+    """
+    metrics = None
+
+    def analyze(self, body: dict, token: str) -> dict:
+        """
+        Sends a `comments:analyze` request with `body` and returns the raw response. Raises :class:`TransportError` if the API responds with an error
+        and `HTTPException` if the API can't be reached.
+        """
+        raise NotImplementedError
+
+    def analyze_batch(self, requests: list[tuple[int, dict]], token: str) -> dict[int, Union[dict, Exception]]:
+        """
+        Sends many `comments:analyze` requests, given as `(index, body)` pairs, and returns the raw response or the error of each of them by its index.
+        Transports that can't pack requests together send them one by one.
+        """
+        responses = {}
+        for index, body in requests:
+            try:
+                responses[index] = self.analyze(body, token)
+            except (TransportError, HTTPException) as exceptionDetails:
+                responses[index] = exceptionDetails
+        return responses
+
+    def close(self) -> None:
+        pass
+
+class DiscoveryTransport(Transport):
+    """
+    The default transport, which sends the requests through `googleapiclient` and `httplib2`, using the discovery document of the API.
+
+    Parameters
+    -----------
+    base_url: :class:`str`
+        The root URL of the API. Default is the Perspective API itself.
+    """
+    def __init__(self, base_url: str = API_URL) -> None:
+        self.service = _get_service(base_url)
+        self.__local = threading.local()
+
+    def __http(self) -> "httplib2.Http":
+        # httplib2.Http objects aren't thread-safe, so every thread sends its requests through its own one.
+        try:
+            return self.__local.http
+        except AttributeError:
+            import httplib2
+
+            self.__local.http = httplib2.Http()
+            return self.__local.http
+
+    def analyze(self, body: dict, token: str) -> dict:
+        from googleapiclient import errors
+        import httplib2
+
+        start = time.perf_counter()
+        try:
+            # googleapiclient encodes the request and decodes the response itself, so they're measured as part of the network phase.
+            response = self.service.comments().analyze(body=body, key=token).execute(http=self.__http())
+        except errors.HttpError as exceptionDetails:
+            raise TransportError(str(exceptionDetails), exceptionDetails.resp.status) from None
+        except (httplib2.error.ServerNotFoundError, OSError) as exceptionDetails:
+            raise HTTPException("Unable to connect to the API. Please check your internet connection.").with_traceback(exceptionDetails.__traceback__) from None
+        if self.metrics is not None:
+            self.metrics.observe("network", time.perf_counter() - start)
+        return response
+
+    def analyze_batch(self, requests: list[tuple[int, dict]], token: str) -> dict[int, Union[dict, Exception]]:
+        from googleapiclient import errors
+        import httplib2
+
+        responses = {}
+
+        def callback(request_id: str, response: dict, exception: Optional[Exception]) -> None:
+            if isinstance(exception, errors.HttpError):
+                exception = TransportError(str(exception), exception.resp.status)
+            responses[int(request_id)] = exception if exception is not None else response
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for index, body in requests:
+            batch.add(self.service.comments().analyze(body=body, key=token), request_id=str(index))
+        try:
+            batch.execute(http=self.__http())
+        except errors.HttpError as exceptionDetails:
+            return {index: TransportError(str(exceptionDetails), exceptionDetails.resp.status) for index, _ in requests}
+        except (httplib2.error.ServerNotFoundError, OSError):
+            return {index: HTTPException("Unable to connect to the API. Please check your internet connection.") for index, _ in requests}
+        return responses
+
+class HTTPTransport(Transport):
+    """
+    A lightweight transport which posts the JSON of `comments:analyze` requests directly, skipping the request building of `googleapiclient`, over a
+    pool of persistent keep-alive connections.
+
+    Parameters
+    -----------
+    base_url: :class:`str`
+        The root URL of the API. Default is the Perspective API itself.
+    pool_size: :class:`int`
+        The maximum number of connections to keep open, which is also the maximum number of requests in flight at once. Default is `10`.
+    timeout: :class:`Optional[float]`
+        How many seconds to wait for the connection and for each response. Default is `30.0`.
+    """
+    def __init__(self, base_url: str = API_URL, pool_size: int = 10, timeout: Optional[float] = 30.0) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.secure = url.scheme == "https"
+        self.port = url.port or (443 if self.secure else 80)
+        self.path = url.path.rstrip("/") + "/"
+        self.pool_size = pool_size
+        self.timeout = timeout
+        if self.secure:
+            import ssl
+
+            self.__ssl = ssl.create_default_context()
+        else:
+            self.__ssl = None
+        self.__idle = queue.LifoQueue()
+        self.__semaphore = threading.BoundedSemaphore(pool_size)
+
+    def __connect(self) -> "http.client.HTTPConnection":
+        import http.client
+
+        if self.secure:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.__ssl)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, path: str, body: bytes, content_type: str = "application/json") -> tuple[int, str, bytes]:
+        import http.client
+
+        headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+        with self.__semaphore:
+            for attempt in range(2):
+                try:
+                    connection, reused = self.__idle.get_nowait(), True
+                except queue.Empty:
+                    connection, reused = self.__connect(), False
+                responded = False
+                try:
+                    connection.request("POST", self.path + path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    responded = True
+                    data = response.read()
+                except (http.client.HTTPException, OSError) as exceptionDetails:
+                    connection.close()
+                    if _retryable(exceptionDetails, reused, attempt, responded):
+                        continue
+                    raise _connection_error(exceptionDetails).with_traceback(exceptionDetails.__traceback__) from None
+                if response.will_close:
+                    connection.close()
+                else:
+                    self.__idle.put(connection)
+                return response.status, response.getheader("Content-Type", ""), data
+
+    def analyze(self, body: dict, token: str) -> dict:
+        metrics = self.metrics
+        if metrics is None:
+            status, _, data = self._request(f"v1alpha1/comments:analyze?key={quote(token)}&alt=json", json.dumps(body, separators=(",", ":")).encode("utf-8"))
+            if status == 200:
+                return json.loads(data)
+            raise _http_error(status, data)
+
+        start = time.perf_counter()
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        sent = time.perf_counter()
+        metrics.observe("serialization", sent - start)
+        status, _, data = self._request(f"v1alpha1/comments:analyze?key={quote(token)}&alt=json", payload)
+        received = time.perf_counter()
+        metrics.observe("network", received - sent)
+        if status == 200:
+            response = json.loads(data)
+            metrics.observe("parse", time.perf_counter() - received)
+            return response
+        raise _http_error(status, data)
+
+    def analyze_batch(self, requests: list[tuple[int, dict]], token: str) -> dict[int, Union[dict, Exception]]:
+        if len(requests) > MAX_BATCH_LIMIT:
+            raise ValueError(f"At most {MAX_BATCH_LIMIT} requests can be sent in a single batch.")
+        from email.parser import Parser
+        import uuid
+
+        boundary = uuid.uuid4().hex
+        parts = []
+        for index, body in requests:
+            data = json.dumps(body, separators=(",", ":"))
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <{boundary} + {index}>\r\n\r\n"
+                f"POST {self.path}v1alpha1/comments:analyze?key={quote(token)}&alt=json HTTP/1.1\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data.encode('utf-8'))}\r\n\r\n"
+                f"{data}\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n")
+        try:
+            status, content_type, data = self._request("batch", "".join(parts).encode("utf-8"), f"multipart/mixed; boundary={boundary}")
+        except HTTPException as exceptionDetails:
+            return {index: exceptionDetails for index, _ in requests}
+        if status != 200:
+            return {index: _http_error(status, data) for index, _ in requests}
+
+        responses = {}
+        message = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n" + data.decode("utf-8"))
+        for part in message.get_payload():
+            index = int(part["Content-ID"].strip("<>").rsplit(" + ", 1)[1])
+            status_line, _, payload = part.get_payload().partition("\n")
+            status = int(status_line.split()[1])
+            body = Parser().parsestr(payload).get_payload()
+            responses[index] = json.loads(body) if status == 200 else _http_error(status, body)
+        for index, _ in requests:
+            responses.setdefault(index, HTTPException("The API did not return a response for the request in the batch."))
+        return responses
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                break
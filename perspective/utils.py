@@ -4,19 +4,70 @@ __license__ = "MIT"
 __copyright__ = "Copyright © 2017-2023 Yilmaz Alpaslan"
 __version__ = "1.0.0"
 
-from typing import Optional, Literal
+from typing import Iterable, Mapping, Optional, Literal, Union
 
-import matplotlib.pyplot as plt
-import matplotlib
-import sqlite3 as sql
 import os
 import json
 
 from .errors import *
 
-matplotlib.set_loglevel("CRITICAL")
+def _pyplot():
+    # matplotlib takes longer to import than the rest of the library together, so it's only imported when a chart is drawn for the first time.
+    import matplotlib
+    import matplotlib.pyplot as plt
+    matplotlib.set_loglevel("CRITICAL")
+    return plt
+
+def _scores(response: Mapping) -> dict[str, float]:
+    return {str(attribute): float(scores['summaryScore']['value']) * 100 for attribute, scores in response["attributeScores"].items()}
 
 class Utils:
+    @staticmethod
+    def normalize(response: Mapping) -> Mapping[str, float]:
+        """
+        Returns the score values of the attributes in `response` as percents, the same as `analyze` returns them. Raw responses (returned with
+        `return_raw=True`) are converted every time, since they may have been modified since; to pass the scores of a raw response to several
+        functions of `utils`, normalize it once and pass the result, or analyze with `compact=True`. Responses which are already simplified are
+        returned as they are.
+
+        Parameters
+        -----------
+        response: :class:`Mapping`
+            The dictionary that the `analyze` function returned, raw or not.
+
+        Returns
+        --------
+        :class:`Mapping[str, float]`: A mapping of attributes and their score values as percents.
+        """
+        if "attributeScores" not in response.keys():
+            return response
+        return _scores(response)
+
+    @staticmethod
+    def normalize_many(responses: Iterable[Union[Mapping, Exception, None]]) -> list[Optional[Mapping[str, float]]]:
+        """
+        Same as `normalize`, but for many responses in a single pass, such as the results of `analyze_many` or `analyze_batch`. Exceptions, which take
+        the place of the texts that couldn't be analyzed, and empty responses become `None`.
+
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The responses.
+
+        Returns
+        --------
+        :class:`list[Optional[Mapping[str, float]]]`: The score values of every response as percents, in the same order.
+        """
+        normalized = []
+        for response in responses:
+            if not isinstance(response, Mapping) or not response:
+                normalized.append(None)
+            elif "attributeScores" in response.keys():
+                normalized.append(_scores(response) or None)
+            else:
+                normalized.append(response)
+        return normalized
+
     @staticmethod
     def format_response(response: dict, align_right: bool = False, sort_by: Optional[Literal["ascending", "descending"]] = None) -> str:
         """
@@ -48,13 +99,7 @@ class Utils:
         if response == {}:
             raise EmptyResponse("The response provided is an empty dictionary. Please make sure you're specifying the correct dictionary.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        response = Utils.normalize(response)
 
         if not not sort_by:
             response = {k: v for k, v in sorted(response.items(), reverse=True if sort_by == "descending" else False if sort_by == "ascending" else None, key=lambda item: item[1])}
@@ -91,13 +136,7 @@ class Utils:
         if response == {}:
             raise EmptyResponse("The response provided is an empty dictionary. Please make sure you're specifying the correct dictionary.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        response = Utils.normalize(response)
 
         return max(response, key=response.get)
     @staticmethod
@@ -117,13 +156,7 @@ class Utils:
         if response == {}:
             raise EmptyResponse("The response provided is an empty dictionary. Please make sure you're specifying the correct dictionary.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        response = Utils.normalize(response)
 
         return min(response, key=response.get)
 
@@ -146,51 +179,15 @@ class Utils:
         if response == {}:
             raise EmptyResponse("The response provided is an empty dictionary. Please make sure you're specifying the correct dictionary.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
-
-        response = {k: v for k, v in sorted(response.items(), key=lambda item: item[1])}
-        keys, values = zip(*response.items())
-        keys = list(keys)
-        for key in keys:
-            keys[keys.index(key)] = key.replace("_"," ").title().replace("On ","on ").replace("To ","to ")
-        keys = tuple(keys)
-
-        fig = plt.figure("Perspective API result" if not title else title, figsize=(15, 6), dpi=80)
-        ax1 = fig.add_subplot(111)
-
-        ax1.barh(keys, values, **kwargs)
-
-        plt.title("Perspective API result" if not title else title)
-        plt.xlabel(xlabel="Score values %")
-        plt.ylabel(ylabel="Attributes")
-
-        rects = ax1.patches
-
-        for rect in rects:
-            x_value = rect.get_width()
-            y_value = rect.get_y() + rect.get_height() / 2
-
-            space = 5
-            ha = 'left'
-            if x_value < 0:
-                space *= -1
-                ha = 'right'
-            label = "{:.1f}%".format(x_value)
+        from .charts import DPI, FIGSIZE, draw
 
-            plt.annotate(label, (x_value, y_value), xytext=(space, 0), textcoords="offset points", va='center', ha=ha)
-
-        plt.xticks([0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
-    
-        if grid_lines == True:
-            plt.grid(b = True, color ='grey', linestyle ='-', linewidth = 0.5, alpha = 0.2)
-
-        plt.show()
+        plt = _pyplot()
+        fig = plt.figure("Perspective API result" if not title else title, figsize=FIGSIZE, dpi=DPI)
+        draw(fig.add_subplot(111), Utils.normalize(response), title, grid_lines, **kwargs)
+        try:
+            plt.show()
+        finally:
+            plt.close(fig)
 
     @staticmethod
     def save_graph(response: dict, filename: str = "chart.png", title: Optional[str] = None, grid_lines: bool = False, **kwargs):
@@ -206,7 +203,7 @@ class Utils:
         title: :class:`Optional[str]`
             The title for the chart. Default is "Perspective API result".
         grid_lines: :class:`bool`
-            Whether the chart should have grid lines or not. Default is `True`
+            Whether the chart should have grid lines or not. Default is `False`
         **kwargs
             Other keyword arguments that belong to `matplotlib.pyplot.barh` function; such as `height`, `color` etc.
         """
@@ -215,52 +212,106 @@ class Utils:
         if response == {}:
             raise EmptyResponse("The response provided is an empty dictionary. Please make sure you're specifying the correct dictionary.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        from .charts import renderer
 
-        response = {k: v for k, v in sorted(response.items(), key=lambda item: item[1])}
-        keys, values = zip(*response.items())
-        keys = list(keys)
-        keys.reverse()
-        for key in keys:
-            keys[keys.index(key)] = key.replace("_"," ").title().replace("On ","on ").replace("To ","to ")
-        keys = tuple(keys)
+        renderer().render(Utils.normalize(response), filename, title, grid_lines, **kwargs)
 
-        fig = plt.figure("Perspective API result" if not title else title, figsize=(15, 6), dpi=80)
-        ax1 = fig.add_subplot(111)
-
-        ax1.barh(keys, values, **kwargs)
-
-        plt.title("Perspective API result" if not title else title)
-        plt.xlabel(xlabel="Score values %")
-        plt.ylabel(ylabel="Attributes")
-
-        rects = ax1.patches
+    @staticmethod
+    def save_graphs(responses: Iterable[Union[Mapping, Exception, None]], out_dir: str, names: Optional[Iterable[str]] = None, format: str = "png", title: Optional[str] = None, grid_lines: bool = False, dpi: Optional[float] = None, **kwargs) -> list[Optional[str]]:
+        r"""
+        Same as `save_graph`, but for many responses at once, such as the results of `analyze_many` or `analyze_batch`. Every chart is drawn on the
+        same figure, so rendering thousands of them takes constant memory. Exceptions and empty responses don't get a chart.
 
-        for rect in rects:
-            x_value = rect.get_width()
-            y_value = rect.get_y() + rect.get_height() / 2
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, or the list that `analyze_many` or `analyze_batch` returned.
+        out_dir: :class:`str`
+            The directory to save the charts to. It's created if it doesn't exist.
+        names: :class:`Optional[Iterable[str]]`
+            The name of the file of every chart, without the extension, in the same order. Default is `None`, which names them after their position.
+        format: :class:`str`
+            The format of the charts, such as "png", "svg" or "pdf". Default is "png".
+        title: :class:`Optional[str]`
+            The title for the charts. Default is "Perspective API result".
+        grid_lines: :class:`bool`
+            Whether the charts should have grid lines or not. Default is `False`.
+        dpi: :class:`Optional[float]`
+            The resolution of the charts in dots per inch. Default is `None`, which is 80.
+        **kwargs
+            Other keyword arguments that belong to `matplotlib.axes.Axes.barh` function; such as `height`, `color` etc.
 
-            space = 5
-            ha = 'left'
-            if x_value < 0:
-                space *= -1
-                ha = 'right'
-            label = "{:.1f}%".format(x_value)
+        Returns
+        --------
+        :class:`list[Optional[str]]`: The path of every chart, or `None` for the responses which don't have one, in the same order.
+        """
+        if out_dir.replace(" ","") == "":
+            raise EmptyFileName("The directory cannot be an empty string.") from None
+        from .charts import renderer
+
+        responses = Utils.normalize_many(responses)
+        names = [str(position) for position in range(len(responses))] if names is None else [str(name) for name in names]
+        if len(names) != len(responses):
+            raise ValueError("names must have an item for every response.")
+        os.makedirs(out_dir, exist_ok=True)
+        chart_renderer = renderer()
+        paths = []
+        for response, name in zip(responses, names):
+            if response is None:
+                paths.append(None)
+                continue
+            path = os.path.join(out_dir, f"{name}.{format}")
+            chart_renderer.render(response, path, title, grid_lines, format=format, dpi=dpi, **kwargs)
+            paths.append(path)
+        return paths
 
-            plt.annotate(label, (x_value, y_value), xytext=(space, 0), textcoords="offset points", va='center', ha=ha)
+    @staticmethod
+    def render_graphs(responses: Iterable[Union[Mapping, Exception, None]], out_dir: str, names: Optional[Iterable[str]] = None, formats: Iterable[str] = ("png",), dpi: Optional[float] = None, max_workers: Optional[int] = None, title: Optional[str] = None, grid_lines: bool = False, **kwargs) -> list:
+        r"""
+        Same as `save_graphs`, but renders the charts across a pool of processes, so that rendering thousands of charts scales with the number of
+        cores instead of being serialized by the GIL. Only the scores of each response are sent to the processes. A chart which can't be rendered
+        doesn't stop the others; its result has the error message instead.
 
-        plt.xticks([0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
-    
-        if grid_lines == True:
-            plt.grid(b = True, color ='grey', linestyle ='-', linewidth = 0.5, alpha = 0.2)
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, or the list that `analyze_many` or `analyze_batch` returned.
+        out_dir: :class:`str`
+            The directory to save the charts to. It's created if it doesn't exist.
+        names: :class:`Optional[Iterable[str]]`
+            The name of the files of every chart, without the extension, in the same order. Default is `None`, which names them after their position.
+        formats: :class:`Iterable[str]`
+            The formats to save every chart in, such as "png", "svg" or "pdf". Default is `("png",)`.
+        dpi: :class:`Optional[float]`
+            The resolution of the charts in dots per inch. Default is `None`, which is 80.
+        max_workers: :class:`Optional[int]`
+            The number of processes to render the charts with. If `None`, a process per CPU is used; if `1`, the charts are rendered in the current
+            process. Default is `None`.
+        title: :class:`Optional[str]`
+            The title for the charts. Default is "Perspective API result".
+        grid_lines: :class:`bool`
+            Whether the charts should have grid lines or not. Default is `False`.
+        **kwargs
+            Other keyword arguments that belong to `matplotlib.axes.Axes.barh` function; such as `height`, `color` etc. They must be picklable.
 
-        plt.savefig(filename, bbox_inches='tight')
+        Returns
+        --------
+        :class:`list[perspective.charts.ChartResult]`: The outcome of every chart in the same order: its name, the paths of its files, and the error
+        message if it couldn't be rendered, such as for the exceptions and empty responses among `responses`.
+        """
+        if out_dir.replace(" ","") == "":
+            raise EmptyFileName("The directory cannot be an empty string.") from None
+        from .charts import render_many
+
+        responses = Utils.normalize_many(responses)
+        names = [str(position) for position in range(len(responses))] if names is None else [str(name) for name in names]
+        if len(names) != len(responses):
+            raise ValueError("names must have an item for every response.")
+        formats = tuple(formats)
+        if not formats:
+            raise ValueError("formats cannot be empty.")
+        os.makedirs(out_dir, exist_ok=True)
+        return render_many(responses, out_dir, names, formats, dpi, max_workers, title, grid_lines, **kwargs)
 
     @staticmethod
     def save_data(response: dict, filename: str = "data.sqlite3", sort_by: Optional[Literal["ascending", "descending"]] = None) -> None:
@@ -282,28 +333,51 @@ class Utils:
         if filename.replace(" ","") == "":
             raise EmptyFileName("The filename cannot be an empty string.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        response = Utils.normalize(response)
         
         if not not sort_by:
             response = {k: v for k, v in sorted(response.items(), reverse=True if sort_by == "descending" else False, key=lambda item: item[1])}
 
         if os.path.exists(filename):
             os.remove(filename)
+        import sqlite3 as sql
+
         con = sql.connect(filename)
-        cursor = con.cursor()
-        cursor.execute(f"CREATE TABLE IF NOT EXISTS data (attribute, value)")
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS data (attribute, value)")
+            con.executemany("INSERT INTO data VALUES (?, ?)", ((attribute.upper(), value) for attribute, value in response.items()))
+        con.close()
 
-        for attribute, value in response.items():
-            cursor.execute(f"INSERT INTO data VALUES ('{attribute.upper()}', {value})")
+    @staticmethod
+    def save_data_many(responses: Iterable[Union[Mapping, Exception, None]], filename: str = "data.sqlite3", comment_ids: Optional[Iterable[str]] = None, texts: Optional[Iterable[str]] = None, synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL") -> int:
+        r"""
+        Appends the scores of many responses, such as the results of `analyze_many` or `analyze_batch`, to a SQLite3 database in a single transaction.
+        Unlike `save_data`, the database isn't recreated; it's a `perspective.storage.ScoreStore`, which has a `scores` table with a row for every
+        score along with the id of its comment, the hash of its text and when it was stored. Exceptions and empty responses are left out.
 
-        con.commit()
-        con.close()
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The responses.
+        filename: :class:`str`
+            The path of the database, including the filename. Default is "data.sqlite3" in the same directory script is running.
+        comment_ids: :class:`Optional[Iterable[str]]`
+            The id of the comment of every response, in the same order. Default is `None`.
+        texts: :class:`Optional[Iterable[str]]`
+            The text of every response, in the same order, to store the hashes of. Default is `None`.
+        synchronous: :class:`Literal["OFF", "NORMAL", "FULL", "EXTRA"]`
+            The `synchronous` setting of SQLite. Default is "NORMAL".
+
+        Returns
+        --------
+        :class:`int`: How many scores have been stored.
+        """
+        if filename.replace(" ","") == "":
+            raise EmptyFileName("The filename cannot be an empty string.") from None
+        from .storage import ScoreStore
+
+        with ScoreStore(filename, synchronous) as store:
+            return store.add_many(responses, comment_ids, texts)
     
     @staticmethod
     def sort_respone(response: dict, sort_by: Literal["alphabetical", "value"] = "value", order: Literal["ascending", "descending"] = "descending") -> dict:
@@ -329,13 +403,7 @@ class Utils:
         elif order not in ["ascending", "descending"]:
             raise UnknownSorting("The order argument can be either \"ascending\" or \"descending\"") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
-
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+        response = Utils.normalize(response)
 
         return {k: v for k, v in sorted(response.items(), reverse=True if order == "descending" else False, key=lambda item: item[1 if sort_by == "value" else 0])}
 
@@ -356,13 +424,102 @@ class Utils:
         if filename.replace(" ","") == "":
             raise EmptyFileName("The filename cannot be an empty string.") from None
 
-        if "attributeScores" in response.keys():
-            response_new = {}
+        response = Utils.normalize(response)
+
+        with open(filename, mode="w", encoding="utf-8") as file:
+            file.write(json.dumps(dict(response), indent=4))
+
+    @staticmethod
+    def export_json_lines(responses: Iterable[Union[Mapping, Exception, None]], filename: str, ids: Optional[Iterable] = None, texts: Optional[Iterable[str]] = None, compress: Optional[bool] = None, max_bytes: Optional[int] = None, include_raw: bool = False) -> int:
+        r"""
+        Appends many responses to a JSON lines file, a compact JSON object per response, without building the whole export in memory. Unlike
+        `export_json`, the file isn't overwritten, so a scored corpus can be exported batch by batch. See `perspective.export.JSONLinesWriter` for
+        the format of the lines, and `perspective.export.read_json_lines` to read them back.
+
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, or the list that `analyze_many` or `analyze_batch` returned.
+        filename: :class:`str`
+            The file to append the responses to.
+        ids: :class:`Optional[Iterable]`
+            The id of the text of every response, in the same order. Default is `None`.
+        texts: :class:`Optional[Iterable[str]]`
+            The text of every response, in the same order, to write the hashes of. Default is `None`.
+        compress: :class:`Optional[bool]`
+            Whether to compress the file with gzip. If `None`, it's compressed if `filename` ends with ".gz". Default is `None`.
+        max_bytes: :class:`Optional[int]`
+            The size at which the next file is started. If `None`, a single file is written. Default is `None`.
+        include_raw: :class:`bool`
+            Whether to write the raw responses too. Default is `False`.
+
+        Returns
+        --------
+        :class:`int`: How many responses have been written.
+        """
+        from .export import JSONLinesWriter
+
+        with JSONLinesWriter(filename, compress=compress, max_bytes=max_bytes, include_raw=include_raw) as writer:
+            return writer.write_many(responses, ids, texts)
+
+    @staticmethod
+    def format_response_many(responses: Iterable[Union[Mapping, Exception, None]], align_right: bool = False, sort_by: Optional[Literal["ascending", "descending"]] = None) -> list[Optional[str]]:
+        """
+        Same as `format_response`, but for many responses at once. Exceptions and empty responses become `None` instead of raising an exception.
+
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, or the list that `analyze_many` or `analyze_batch` returned.
+        align_right: :class:`bool`
+            Whether the attribute names should be aligned to right or not. Default is `False`.
+        sort_by: :class:`Optional[Literal["ascending", "descending"]]`
+            Whether to sort the attributes ascending or descending according to their score values. If `None`, attributes will not be sorted. Default is `None`.
+
+        Returns
+        --------
+        :class:`list[Optional[str]]`: The formatted texts, in the same order.
+        """
+        return [Utils.format_response(response, align_right, sort_by) if response is not None else None for response in Utils.normalize_many(responses)]
 
-            for attribute in response["attributeScores"].keys():
-                response_new[str(attribute)] = float(response['attributeScores'][str(attribute)]['summaryScore']['value']) * 100
-            response = response_new
-            del response_new
+    @staticmethod
+    def get_highest_many(responses: Iterable[Union[Mapping, Exception, None]]) -> list[Optional[str]]:
+        """
+        Same as `get_highest`, but for many responses at once. Exceptions and empty responses become `None` instead of raising an exception.
+        """
+        return [max(response, key=response.get) if response is not None else None for response in Utils.normalize_many(responses)]
+
+    @staticmethod
+    def get_lowest_many(responses: Iterable[Union[Mapping, Exception, None]]) -> list[Optional[str]]:
+        """
+        Same as `get_lowest`, but for many responses at once. Exceptions and empty responses become `None` instead of raising an exception.
+        """
+        return [min(response, key=response.get) if response is not None else None for response in Utils.normalize_many(responses)]
 
+    @staticmethod
+    def sort_response_many(responses: Iterable[Union[Mapping, Exception, None]], sort_by: Literal["alphabetical", "value"] = "value", order: Literal["ascending", "descending"] = "descending") -> list[Optional[dict]]:
+        """
+        Same as `sort_respone`, but for many responses at once. Exceptions and empty responses become `None`.
+        """
+        if sort_by not in ["alphabetical", "value"]:
+            raise UnknownSorting("The sort_by argument can be either \"alphabetical\" or \"value\"") from None
+        elif order not in ["ascending", "descending"]:
+            raise UnknownSorting("The order argument can be either \"ascending\" or \"descending\"") from None
+        return [Utils.sort_respone(response, sort_by, order) if response is not None else None for response in Utils.normalize_many(responses)]
+
+    @staticmethod
+    def export_json_many(responses: Iterable[Union[Mapping, Exception, None]], filename: str) -> None:
+        r"""
+        Exports many responses to a single JSON file, as a list in the same order as `responses`. Exceptions and empty responses are exported as `null`.
+
+        Parameters
+        -----------
+        responses: :class:`Iterable[Union[Mapping, Exception, None]]`
+            The dictionaries that `analyze` returned, or the list that `analyze_many` or `analyze_batch` returned.
+        filename: :class:`str`
+            The file to save the responses in a JSON format to.
+        """
+        if filename.replace(" ","") == "":
+            raise EmptyFileName("The filename cannot be an empty string.") from None
         with open(filename, mode="w", encoding="utf-8") as file:
-            file.write(json.dumps(response, indent=4))
+            json.dump([dict(response) if response is not None else None for response in Utils.normalize_many(responses)], file, indent=4)
@@ -5,6 +5,8 @@ with open("README.md", encoding="utf-8", mode="r") as file:
 setup(
     name='perspective.py',
     packages=find_packages(include=['perspective']),
+    package_data={'perspective': ['*.json']},
+    entry_points={'console_scripts': ['perspective = perspective.cli:main']},
     version='0.3.4',
     description='An easy-to-use API wrapper for Perspective API written in Python.',
     long_description=long_desc,